@@ -0,0 +1,115 @@
+import asyncio
+from typing import List, Optional
+from beanie import PydanticObjectId
+from config import settings
+from models.activity import ActivityAction, ActivityBase
+from models.kind import ObjectKind
+from storage import storage
+
+
+class ActivityLog:
+    """In-process queue of activity entries, written in batches by a background flusher.
+    
+    Recording never waits: entries go into a bounded queue, and when the
+    queue is full they are dropped and counted. Every `interval` seconds
+    the flusher writes whatever is queued with one `add_many` per
+    `batch_size` entries.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._flusher: Optional[asyncio.Task] = None
+        self._write: Optional[asyncio.Task] = None
+
+    def record(self, entry: ActivityBase):
+        """Queue an entry for the next flush."""
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        self._flusher = asyncio.create_task(self._run())
+
+    def _next_batch(self) -> List[ActivityBase]:
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write_batch(self, batch: List[ActivityBase]):
+        try:
+            await storage.activity.add_many(batch)
+        except Exception as e:
+            print(f"❌ Activity log write failed, {len(batch)} entries lost: {str(e)}")
+        if self.dropped:
+            print(f"❌ Activity log queue full, {self.dropped} entries dropped")
+            self.dropped = 0
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            while not self._queue.empty():
+                # Shielded so stopping the flusher does not cut a write short
+                self._write = asyncio.create_task(self._write_batch(self._next_batch()))
+                await asyncio.shield(self._write)
+
+    async def close(self):
+        """Stop the flusher and write everything still queued."""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._write:
+            await self._write
+        while not self._queue.empty():
+            await self._write_batch(self._next_batch())
+
+
+_activity_log: Optional[ActivityLog] = None
+
+
+def record_activity(
+    user_id: PydanticObjectId,
+    kind: ObjectKind,
+    object_id: PydanticObjectId,
+    action: ActivityAction,
+    title: Optional[str] = None,
+    changes: Optional[List[str]] = None
+):
+    """Add a change to the activity log without blocking the request."""
+    if _activity_log is not None:
+        _activity_log.record(ActivityBase(
+            user_id=user_id,
+            kind=kind,
+            object_id=object_id,
+            action=action,
+            title=title,
+            changes=changes or []
+        ))
+
+
+def start_activity_log():
+    """Start queueing and flushing activity entries if enabled."""
+    global _activity_log
+    if settings.activity_log_enabled and _activity_log is None:
+        _activity_log = ActivityLog(
+            max_queue=settings.activity_queue_size,
+            batch_size=settings.activity_batch_size,
+            interval=settings.activity_flush_interval_ms / 1000,
+        )
+        _activity_log.start()
+
+
+async def stop_activity_log():
+    """Flush queued activity entries and stop the activity log."""
+    global _activity_log
+    if _activity_log:
+        activity_log, _activity_log = _activity_log, None
+        await activity_log.close()
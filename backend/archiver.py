@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from config import settings
+from models.kind import ObjectKind
+from models.tombstone import TombstoneBase
+from storage import storage
+
+_archiver_task: Optional[asyncio.Task] = None
+
+
+async def archive_completed_tasks(older_than: timedelta, batch_size: int) -> int:
+    """Move tasks completed before now - older_than into the archive, in batches."""
+    cutoff = datetime.utcnow() - older_than
+    moved = 0
+    
+    while True:
+        archived = await storage.tasks.archive_batch(cutoff, batch_size)
+        moved += len(archived)
+        
+        # Archived tasks leave the default task list, so delta sync clients
+        # see them as deletions until they are restored
+        await storage.tombstones.add_many([
+            TombstoneBase(user_id=task.user_id, kind=ObjectKind.TASK, object_id=task.id)
+            for task in archived
+        ])
+        
+        if len(archived) < batch_size:
+            break
+    
+    return moved
+
+
+async def _run_archiver():
+    """Periodically archive completed tasks until cancelled."""
+    while True:
+        try:
+            moved = await archive_completed_tasks(
+                older_than=timedelta(days=settings.archive_after_days),
+                batch_size=settings.archive_batch_size,
+            )
+            if moved:
+                print(f"✓ Archived {moved} completed tasks")
+        except Exception as e:
+            print(f"❌ Task archival failed: {str(e)}")
+        await asyncio.sleep(settings.archive_interval_minutes * 60)
+
+
+def start_archiver():
+    """Start the background archiver if enabled."""
+    global _archiver_task
+    if settings.archive_enabled and _archiver_task is None:
+        _archiver_task = asyncio.create_task(_run_archiver())
+
+
+async def stop_archiver():
+    """Stop the background archiver."""
+    global _archiver_task
+    if _archiver_task:
+        _archiver_task.cancel()
+        try:
+            await _archiver_task
+        except asyncio.CancelledError:
+            pass
+        _archiver_task = None
@@ -5,8 +5,10 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from models.token import TokenData
-from models.user import User, UserInDB
+from models.user import UserInDB
 from config import settings
+from profiling import phase
+from storage import storage
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -42,7 +44,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        with phase("auth"):
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -50,12 +53,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
     except JWTError:
         raise credentials_exception
     
-    # Use Beanie to find user
-    user = await User.find_one(User.email == token_data.email)
+    with phase("db"):
+        user = await storage.users.get_by_email(token_data.email)
     if user is None:
         raise credentials_exception
     
-    # Convert Beanie document to UserInDB
+    # Convert stored user to UserInDB
     return UserInDB(
         id=str(user.id),
         email=user.email,
@@ -67,7 +70,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
 
 async def get_user_by_email(email: str) -> Optional[UserInDB]:
     """Get a user by email."""
-    user = await User.find_one(User.email == email)
+    user = await storage.users.get_by_email(email)
     if user:
         return UserInDB(
             id=str(user.id),
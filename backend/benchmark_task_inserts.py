@@ -0,0 +1,93 @@
+"""Benchmark task insert throughput and latency with and without write coalescing.
+
+Usage:
+    python benchmark_task_inserts.py [--tasks 2000] [--concurrency 200]
+        [--windows 1,2,5] [--max-batch 100]
+
+Writes into a separate `<DATABASE_NAME>_benchmark` database, which is
+dropped at the end. Each run fires `--tasks` inserts with at most
+`--concurrency` in flight. It reports inserts per second and the latency
+each caller saw, so the throughput gained can be weighed against the
+latency the window adds.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from beanie import PydanticObjectId, init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from config import settings
+from models.task import Task
+from write_coalescing import InsertBatcher
+
+
+def _new_task(user_id: PydanticObjectId, n: int) -> Task:
+    now = datetime.utcnow()
+    return Task(
+        title=f"Benchmark task {n}",
+        deadline=now + timedelta(days=7),
+        user_id=user_id,
+        created_at=now,
+        updated_at=now
+    )
+
+
+async def _run(label: str, insert, total: int, concurrency: int):
+    user_id = PydanticObjectId()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(n: int):
+        async with semaphore:
+            task = _new_task(user_id, n)
+            start = time.perf_counter()
+            await insert(task)
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(total)))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<28}{total / elapsed:>12,.0f}/s{p50:>12.2f} ms{p99:>12.2f} ms")
+
+
+async def main(total: int, concurrency: int, windows: list, max_batch: int):
+    client = AsyncIOMotorClient(settings.mongodb_url, serverSelectionTimeoutMS=5000)
+    database_name = f"{settings.database_name}_benchmark"
+    await init_beanie(database=client[database_name], document_models=[Task])
+    
+    try:
+        print(f"{total} inserts, {concurrency} concurrent\n")
+        print(f"{'mode':<28}{'throughput':>14}{'p50':>15}{'p99':>15}")
+
+        async def direct(task: Task):
+            await task.insert()
+    
+        await _run("insert() per task", direct, total, concurrency)
+    
+        for window_ms in windows:
+            batcher = InsertBatcher(Task, window=window_ms / 1000, max_batch=max_batch)
+            await _run(f"coalesced, {window_ms:g} ms window", batcher.insert, total, concurrency)
+            await batcher.close()
+    finally:
+        await client.drop_database(database_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--windows", default="1,2,5", help="Comma-separated windows in milliseconds")
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(
+        args.tasks,
+        args.concurrency,
+        [float(window) for window in args.windows.split(",")],
+        args.max_batch,
+    ))
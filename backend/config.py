@@ -5,10 +5,67 @@ from typing import Optional
 class Settings(BaseSettings):
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "todo_app"
+    # "mongo", or "memory" for single-node deployments and tests without MongoDB
+    storage_engine: str = "mongo"
     secret_key: str = "your-secret-key-change-this-in-production-09876543210"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Match user and label references stored as hex strings as well as
+    # ObjectIds. Turn off once migrate_objectid_refs.py has completed.
+    string_ref_fallback: bool = True
+    
+    # Archival of completed tasks into the cold `tasks_archive` collection
+    archive_enabled: bool = True
+    archive_after_days: int = 30
+    archive_batch_size: int = 500
+    archive_interval_minutes: int = 60
+    
+    # Delta sync: deletions are remembered for this long, older sync tokens
+    # get a full resync instead. Changing it updates the TTL index on startup.
+    tombstone_ttl_days: int = 30
+    
+    # Write coalescing: concurrent task inserts arriving within the window
+    # (or until the batch cap is hit) are written with one insert_many
+    task_insert_coalescing: bool = False
+    task_insert_window_ms: float = 2.0
+    task_insert_max_batch: int = 100
+    
+    # Load shedding: per route group concurrency budgets and a bounded wait
+    # queue; requests waiting longer than the timeout get a 503
+    load_shedding_enabled: bool = True
+    auth_max_concurrency: int = 8
+    task_reads_max_concurrency: int = 32
+    task_writes_max_concurrency: int = 16
+    labels_max_concurrency: int = 16
+    route_queue_size: int = 64
+    route_queue_timeout_ms: int = 500
+    retry_after_seconds: int = 1
+    
+    # Activity log: entries are queued in process and written in batches by a
+    # background flusher; when the queue is full new entries are dropped.
+    # Changing activity_ttl_days updates the TTL index on startup.
+    activity_log_enabled: bool = True
+    activity_ttl_days: int = 90
+    activity_queue_size: int = 10000
+    activity_batch_size: int = 500
+    activity_flush_interval_ms: int = 500
+    
+    # Task calendar: how long clients may reuse a response before revalidating
+    # it with its ETag
+    calendar_max_age_seconds: int = 60
+    
+    # Task hierarchies: deepest level the subtree and dependency endpoints
+    # walk in one request
+    task_graph_max_depth: int = 10
+    
+    # Per-request profiling: requests sending `X-Profile: <profiling_token>`
+    # are sampled into collapsed-stack files and get a Server-Timing header
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None
+    profiling_output_dir: str = "profiles"
+    profiling_interval_ms: float = 1.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
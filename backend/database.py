@@ -2,12 +2,39 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from config import settings
 from models.user import User
-from models.task import Task
+from models.task import Task, TaskArchive
 from models.label import Label
+from models.tombstone import Tombstone, TOMBSTONE_TTL_SECONDS
+from models.activity import Activity, ACTIVITY_TTL_SECONDS
 import sys
 
 client = None
 
+# MongoDB error code for unique index violations
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def _drop_non_unique_index(collection, name: str):
+    """Drop an index that a model now declares as unique, so it can be recreated."""
+    index_information = await collection.index_information()
+    index = index_information.get(name)
+    if index and not index.get("unique"):
+        await collection.drop_index(name)
+        print(f"✓ Dropped non-unique index {collection.name}.{name}")
+
+
+async def _sync_ttl_index(collection, name: str, expire_after_seconds: int):
+    """Apply a changed TTL setting to an existing index; init_beanie would reject the new options."""
+    index_information = await collection.index_information()
+    index = index_information.get(name)
+    if index and index.get("expireAfterSeconds") not in (None, expire_after_seconds):
+        await collection.database.command(
+            "collMod",
+            collection.name,
+            index={"name": name, "expireAfterSeconds": expire_after_seconds}
+        )
+        print(f"✓ Changed TTL of {collection.name}.{name} to {expire_after_seconds}s")
+
 
 async def connect_to_mongo():
     """Initialize MongoDB connection and Beanie ODM."""
@@ -29,15 +56,22 @@ async def connect_to_mongo():
         
         database = client[settings.database_name]
         
+        # Older databases have a plain index on users.email
+        await _drop_non_unique_index(database["users"], "email_1")
+        
+        # TTL settings may have changed since the indexes were created
+        await _sync_ttl_index(database["tombstones"], "deleted_at_1", TOMBSTONE_TTL_SECONDS)
+        await _sync_ttl_index(database["activity"], "created_at_1", ACTIVITY_TTL_SECONDS)
+        
         # Initialize Beanie with the document models
         print("Initializing Beanie ODM...")
         await init_beanie(
             database=database,
-            document_models=[User, Task, Label]
+            document_models=[User, Task, TaskArchive, Label, Tombstone, Activity]
         )
         
         print(f"✓ Connected to MongoDB database: {settings.database_name}")
-        print(f"✓ Beanie ODM initialized with models: User, Task, Label")
+        print(f"✓ Beanie ODM initialized with models: User, Task, TaskArchive, Label, Tombstone, Activity")
         
     except Exception as e:
         print(f"❌ Failed to connect to MongoDB: {str(e)}")
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Dict, Optional
+from starlette.responses import JSONResponse
+from config import settings
+
+
+class RouteLimiter:
+    """Concurrency budget with a bounded wait queue for one group of routes."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.shed = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False means the request should be shed."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        elif self.queued >= self.max_queue:
+            self.shed += 1
+            return False
+        else:
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+            finally:
+                self.queued -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "shed": self.shed,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+
+def _limiter(max_concurrency: int) -> RouteLimiter:
+    return RouteLimiter(
+        max_concurrency,
+        max_queue=settings.route_queue_size,
+        queue_timeout=settings.route_queue_timeout_ms / 1000,
+    )
+
+
+# Budgets are kept below the Mongo connection pool (100 by default) so one
+# group cannot take every connection.
+route_limiters: Dict[str, RouteLimiter] = {
+    "auth": _limiter(settings.auth_max_concurrency),
+    "task_reads": _limiter(settings.task_reads_max_concurrency),
+    "task_writes": _limiter(settings.task_writes_max_concurrency),
+    "labels": _limiter(settings.labels_max_concurrency),
+}
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """Map a request to the route group whose budget it draws from."""
+    if path.startswith("/api/auth"):
+        return "auth"
+    if path.startswith(("/api/tasks", "/api/sync", "/api/activity")):
+        return "task_reads" if method in ("GET", "HEAD") else "task_writes"
+    if path.startswith("/api/labels"):
+        return "labels"
+    return None
+
+
+def load_stats() -> Dict[str, dict]:
+    """Current queue depth, in-flight count and shed count per route group."""
+    return {name: limiter.stats() for name, limiter in route_limiters.items()}
+
+
+class LoadSheddingMiddleware:
+    """Bound in-flight requests per route group and shed load with 503s.
+    
+    Requests beyond a group's concurrency budget wait in a bounded queue.
+    If the queue is full, or the wait exceeds ROUTE_QUEUE_TIMEOUT_MS, the
+    request fails fast with 503 and a Retry-After header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        group = route_group(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+    
+        limiter = route_limiters[group]
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(settings.retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+    
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -1,18 +1,30 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import connect_to_mongo, close_mongo_connection
-from routers import auth_router, users_router, tasks_router, labels_router
+from storage import storage
+from archiver import start_archiver, stop_archiver
+from write_coalescing import start_task_batcher, stop_task_batcher
+from activity_log import start_activity_log, stop_activity_log
+from config import settings
+from profiling import ProfilingMiddleware
+from load_shedding import LoadSheddingMiddleware, load_stats
+from routers import auth_router, users_router, tasks_router, labels_router, sync_router, activity_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown."""
     # Startup
-    await connect_to_mongo()
+    await storage.connect()
+    start_archiver()
+    start_task_batcher()
+    start_activity_log()
     yield
     # Shutdown
-    await close_mongo_connection()
+    await stop_activity_log()
+    await stop_task_batcher()
+    await stop_archiver()
+    await storage.close()
 
 
 app = FastAPI(
@@ -22,6 +34,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Added before CORS so shed requests still get CORS headers
+if settings.load_shedding_enabled:
+    app.add_middleware(LoadSheddingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -31,11 +47,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
 app.include_router(tasks_router, prefix="/api")
 app.include_router(labels_router, prefix="/api")
+app.include_router(sync_router, prefix="/api")
+app.include_router(activity_router, prefix="/api")
 
 
 @app.get("/")
@@ -54,6 +75,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/load")
+async def load_check():
+    """Queue depth, in-flight requests and shed counts per route group."""
+    return load_stats()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,151 @@
+"""Rewrite user and label references stored as hex strings into native ObjectIds.
+
+Usage:
+    python migrate_objectid_refs.py [--batch-size 1000] [--dry-run]
+
+The migration runs online: the API reads both representations while
+STRING_REF_FALLBACK is enabled, and every batch only selects documents that
+still hold string references, so an interrupted run can simply be restarted.
+Documents whose converted references would hit a unique index (a label
+named like one the user created after the API switched to ObjectIds) are
+skipped and listed for manual review, like strings that are not valid
+ObjectIds. Once it reports no remaining documents, set
+STRING_REF_FALLBACK=false.
+"""
+import argparse
+import asyncio
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config import settings
+from database import DUPLICATE_KEY_ERROR
+
+# Collection name -> reference fields it holds
+REFERENCE_FIELDS = {
+    "tasks": ["user_id", "labels"],
+    "tasks_archive": ["user_id", "labels"],
+    "labels": ["user_id"],
+    "tombstones": ["user_id"],
+}
+
+
+def _to_object_id(value):
+    """Convert a hex string reference to an ObjectId, leaving anything else untouched."""
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+def _string_refs_query(fields: list) -> dict:
+    # $type also matches arrays that contain at least one string element
+    return {"$or": [{field: {"$type": "string"}} for field in fields]}
+
+
+async def _collection_sizes(database, name: str) -> dict:
+    stats = await database.command("collStats", name)
+    return {
+        "count": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "storage_size": stats.get("storageSize", 0),
+        "index_size": stats.get("totalIndexSize", 0),
+        "index_sizes": stats.get("indexSizes", {}),
+    }
+
+
+def _print_report(name: str, before: dict, after: dict):
+    def kb(value):
+        return f"{value / 1024:,.1f} KB"
+    
+    print(f"\n{name} ({after['count']} documents)")
+    print(f"  {'':<28}{'before':>14}{'after':>14}")
+    print(f"  {'data size':<28}{kb(before['size']):>14}{kb(after['size']):>14}")
+    print(f"  {'storage size':<28}{kb(before['storage_size']):>14}{kb(after['storage_size']):>14}")
+    print(f"  {'total index size':<28}{kb(before['index_size']):>14}{kb(after['index_size']):>14}")
+    for index_name, size in after["index_sizes"].items():
+        previous = before["index_sizes"].get(index_name, 0)
+        print(f"    {index_name:<26}{kb(previous):>14}{kb(size):>14}")
+
+
+async def migrate_collection(collection, fields: list, batch_size: int, dry_run: bool) -> tuple:
+    """Convert string references in one collection. Returns (converted, skipped)."""
+    converted = 0
+    skipped = 0
+    last_id = None
+    
+    while True:
+        query = _string_refs_query(fields)
+        if last_id is not None:
+            query = {"$and": [query, {"_id": {"$gt": last_id}}]}
+        batch = await collection.find(query, {field: 1 for field in fields}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+    
+        operations = []
+        operation_ids = []
+        for document in batch:
+            changes = {}
+            for field in fields:
+                value = document.get(field)
+                new_value = [_to_object_id(v) for v in value] if isinstance(value, list) else _to_object_id(value)
+                if new_value != value:
+                    changes[field] = new_value
+            if not changes:
+                # Strings that are not valid ObjectIds are left for manual review
+                skipped += 1
+                continue
+            # Only rewrite if the document was not changed by the API meanwhile
+            expected = {field: document.get(field) for field in changes}
+            operations.append(UpdateOne({"_id": document["_id"], **expected}, {"$set": changes}))
+            operation_ids.append(document["_id"])
+    
+        if operations and not dry_run:
+            try:
+                result = await collection.bulk_write(operations, ordered=False)
+                converted += result.modified_count
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                    raise
+                converted += e.details.get("nModified", 0)
+                # The converted document would clash with one the API created
+                # meanwhile, e.g. a second label with the same name
+                for error in errors:
+                    skipped += 1
+                    print(f"  {collection.name}: skipped {operation_ids[error['index']]} ({error.get('errmsg')})")
+        else:
+            converted += len(operations)
+        print(f"  {collection.name}: {converted} converted so far")
+    
+    return converted, skipped
+
+
+async def main(batch_size: int, dry_run: bool):
+    client = AsyncIOMotorClient(settings.mongodb_url, serverSelectionTimeoutMS=5000)
+    database = client[settings.database_name]
+    existing = set(await database.list_collection_names())
+    
+    try:
+        for name, fields in REFERENCE_FIELDS.items():
+            if name not in existing:
+                continue
+            before = await _collection_sizes(database, name)
+            converted, skipped = await migrate_collection(database[name], fields, batch_size, dry_run)
+            after = await _collection_sizes(database, name)
+            print(f"✓ {name}: {converted} documents converted, {skipped} skipped")
+            _print_report(name, before, after)
+    
+        print("\nNote: storage size only shrinks after WiredTiger reuses or compacts the freed space.")
+        if dry_run:
+            print("Dry run: no documents were modified.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -1,11 +1,21 @@
-from .user import User, UserCreate, UserUpdate, UserInDB, UserResponse
-from .task import Task, TaskCreate, TaskUpdate, TaskResponse, PriorityLevel
-from .label import Label, LabelCreate, LabelUpdate, LabelResponse
+from .user import User, UserBase, UserCreate, UserUpdate, UserInDB, UserResponse
+from .task import Task, TaskBase, TaskArchive, TaskCreate, TaskUpdate, TaskResponse, PriorityLevel
+from .label import Label, LabelBase, LabelCreate, LabelUpdate, LabelResponse, LabelSummary
 from .token import Token, TokenData
+from .kind import ObjectKind
+from .tombstone import Tombstone, TombstoneBase
+from .sync import SyncResponse
+from .calendar import CalendarDay, DeadlineCount
+from .activity import Activity, ActivityAction, ActivityBase, ActivityPage, ActivityResponse
 
 __all__ = [
-    "User", "UserCreate", "UserUpdate", "UserInDB", "UserResponse",
-    "Task", "TaskCreate", "TaskUpdate", "TaskResponse", "PriorityLevel",
-    "Label", "LabelCreate", "LabelUpdate", "LabelResponse",
-    "Token", "TokenData"
+    "User", "UserBase", "UserCreate", "UserUpdate", "UserInDB", "UserResponse",
+    "Task", "TaskBase", "TaskArchive", "TaskCreate", "TaskUpdate", "TaskResponse", "PriorityLevel",
+    "Label", "LabelBase", "LabelCreate", "LabelUpdate", "LabelResponse", "LabelSummary",
+    "Token", "TokenData",
+    "ObjectKind",
+    "Tombstone", "TombstoneBase",
+    "SyncResponse",
+    "CalendarDay", "DeadlineCount",
+    "Activity", "ActivityAction", "ActivityBase", "ActivityPage", "ActivityResponse"
 ]
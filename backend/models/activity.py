@@ -0,0 +1,64 @@
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+from config import settings
+from .kind import ObjectKind
+
+
+# Applied to an existing index on startup by database.connect_to_mongo
+ACTIVITY_TTL_SECONDS = settings.activity_ttl_days * 24 * 60 * 60
+
+
+class ActivityAction(str, Enum):
+    """What happened to a task or label."""
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    RESTORED = "restored"
+
+
+class ActivityBase(BaseModel):
+    """One change to a user's task or label, kept for the activity log."""
+    user_id: PydanticObjectId
+    kind: ObjectKind  # task or label
+    object_id: PydanticObjectId
+    action: ActivityAction
+    title: Optional[str] = None  # Task title or label name at the time
+    changes: List[str] = []  # Fields sent with an update
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Activity(ActivityBase, Document):
+    """Activity log entry document model for MongoDB."""
+    
+    class Settings:
+        name = "activity"
+        indexes = [
+            # Used to page through a user's log, newest first
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            # Entries expire after the retention period
+            IndexModel(
+                [("created_at", ASCENDING)],
+                expireAfterSeconds=ACTIVITY_TTL_SECONDS,
+            ),
+        ]
+
+
+class ActivityResponse(BaseModel):
+    """Schema for an activity log entry response."""
+    id: str
+    kind: ObjectKind
+    object_id: str
+    action: ActivityAction
+    title: Optional[str] = None
+    changes: List[str] = []
+    created_at: datetime
+
+
+class ActivityPage(BaseModel):
+    """Schema for one page of the activity log."""
+    items: List[ActivityResponse]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+from datetime import date
+from .task import PriorityLevel
+
+
+class DeadlineCount(BaseModel):
+    """Number of tasks due on one local day with a given status and priority."""
+    day: date
+    completed: bool
+    priority: PriorityLevel
+    count: int
+
+
+class CalendarDay(BaseModel):
+    """Schema for one day of the task calendar."""
+    day: date
+    total: int = 0
+    completed: int = 0
+    pending: int = 0
+    priority: Dict[str, int] = Field(default_factory=lambda: {level.value: 0 for level in PriorityLevel})
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ObjectKind(str, Enum):
+    """Kind of user-owned object that tombstones and activity entries refer to."""
+    TASK = "task"
+    LABEL = "label"
@@ -1,19 +1,31 @@
-from beanie import Document
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 from typing import Optional
 from datetime import datetime
 
 
-class Label(Document):
-    """Label document model for MongoDB."""
+class LabelBase(BaseModel):
+    """Label fields shared by the MongoDB document and in-memory storage."""
     name: str = Field(..., min_length=1, max_length=50)
     color: str = Field(..., pattern="^#([A-Fa-f0-9]{6}|[A-Fa-f0-9]{3})$")  # Hex color code
-    user_id: str = Field(..., index=True)
+    user_id: PydanticObjectId = Field(..., index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Label(LabelBase, Document):
+    """Label document model for MongoDB."""
     
     class Settings:
         name = "labels"
-        indexes = ["user_id"]
+        indexes = [
+            "user_id",
+            # Label names are unique per user
+            IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], unique=True),
+            # Used by delta sync to find labels changed since a sync token
+            IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)]),
+        ]
     
     class Config:
         json_schema_extra = {
@@ -47,3 +59,10 @@ class LabelResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class LabelSummary(BaseModel):
+    """Label fields embedded in task responses when labels are expanded."""
+    id: str
+    name: str
+    color: str
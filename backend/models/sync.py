@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+from .task import TaskResponse
+from .label import LabelResponse
+
+
+class SyncResponse(BaseModel):
+    """Schema for a delta sync response."""
+    tasks: List[TaskResponse]
+    labels: List[LabelResponse]
+    deleted_tasks: List[str]
+    deleted_labels: List[str]
+    sync_token: str
+    full_sync: bool
@@ -1,8 +1,10 @@
-from beanie import Document
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+from .label import LabelSummary
 
 
 class PriorityLevel(str, Enum):
@@ -12,21 +14,41 @@ class PriorityLevel(str, Enum):
     LOW = "Low"
 
 
-class Task(Document):
-    """Task document model for MongoDB."""
+class TaskBase(BaseModel):
+    """Task fields shared by the MongoDB document and in-memory storage."""
     title: str = Field(..., min_length=1, max_length=200)
     description: Optional[str] = None
     priority: PriorityLevel = PriorityLevel.MEDIUM
     deadline: datetime
     completed: bool = False
-    labels: List[str] = []  # List of label IDs
-    user_id: str = Field(..., index=True)
+    labels: List[PydanticObjectId] = []  # List of label IDs
+    parent_id: Optional[PydanticObjectId] = None  # Set on subtasks
+    blocked_by: List[PydanticObjectId] = []  # Tasks that have to be done first
+    user_id: PydanticObjectId = Field(..., index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
+
+class Task(TaskBase, Document):
+    """Task document model for MongoDB."""
     
     class Settings:
         name = "tasks"
-        indexes = ["user_id", "completed", "deadline"]
+        indexes = [
+            "user_id",
+            "completed",
+            "deadline",
+            # Used by the archiver to find tasks completed before the cutoff
+            IndexModel([("completed", ASCENDING), ("completed_at", ASCENDING)]),
+            # Used by delta sync to find tasks changed since a sync token
+            IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)]),
+            # Used by the calendar to count a user's tasks due in a date range
+            IndexModel([("user_id", ASCENDING), ("deadline", ASCENDING)]),
+            # Followed by $graphLookup to walk subtasks and dependents
+            IndexModel([("parent_id", ASCENDING)]),
+            IndexModel([("blocked_by", ASCENDING)]),
+        ]
     
     class Config:
         json_schema_extra = {
@@ -42,6 +64,20 @@ class Task(Document):
         }
 
 
+class TaskArchive(Task):
+    """Completed task moved out of the hot `tasks` collection by the archiver."""
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "tasks_archive"
+        # Archived tasks are only listed per user and counted by the
+        # calendar, so keep the indexes slim
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("user_id", ASCENDING), ("deadline", ASCENDING)]),
+        ]
+
+
 class TaskCreate(BaseModel):
     """Schema for creating a new task."""
     title: str = Field(..., min_length=1, max_length=200)
@@ -50,6 +86,8 @@ class TaskCreate(BaseModel):
     deadline: datetime
     completed: bool = False
     labels: List[str] = []
+    parent_id: Optional[str] = None
+    blocked_by: List[str] = []
 
 
 class TaskUpdate(BaseModel):
@@ -60,6 +98,8 @@ class TaskUpdate(BaseModel):
     deadline: Optional[datetime] = None
     completed: Optional[bool] = None
     labels: Optional[List[str]] = None
+    parent_id: Optional[str] = None  # Send null to detach from the parent
+    blocked_by: Optional[List[str]] = None
 
 
 class TaskResponse(BaseModel):
@@ -71,6 +111,9 @@ class TaskResponse(BaseModel):
     deadline: datetime
     completed: bool
     labels: List[str]
+    label_details: Optional[List[LabelSummary]] = None  # Only set with expand=labels
+    parent_id: Optional[str] = None
+    blocked_by: List[str] = []
     user_id: str
     created_at: datetime
     updated_at: datetime
@@ -0,0 +1,33 @@
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime
+from config import settings
+from .kind import ObjectKind
+
+
+# Applied to an existing index on startup by database.connect_to_mongo
+TOMBSTONE_TTL_SECONDS = settings.tombstone_ttl_days * 24 * 60 * 60
+
+
+class TombstoneBase(BaseModel):
+    """Record of a deleted task or label, kept so delta sync can report deletions."""
+    user_id: PydanticObjectId
+    kind: ObjectKind
+    object_id: PydanticObjectId
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Tombstone(TombstoneBase, Document):
+    """Tombstone document model for MongoDB."""
+    
+    class Settings:
+        name = "tombstones"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("deleted_at", ASCENDING)]),
+            # Tombstones expire once no sync token can still refer to them
+            IndexModel(
+                [("deleted_at", ASCENDING)],
+                expireAfterSeconds=TOMBSTONE_TTL_SECONDS,
+            ),
+        ]
@@ -1,19 +1,26 @@
-from beanie import Document
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, EmailStr, Field
+from pymongo import ASCENDING, IndexModel
 from typing import Optional
 from datetime import datetime
 
 
-class User(Document):
-    """User document model for MongoDB."""
+class UserBase(BaseModel):
+    """User fields shared by the MongoDB document and in-memory storage."""
     email: EmailStr = Field(..., unique=True)
     full_name: Optional[str] = Field(None, min_length=1, max_length=100)
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class User(UserBase, Document):
+    """User document model for MongoDB."""
     
     class Settings:
         name = "users"
-        indexes = ["email"]
+        indexes = [
+            IndexModel([("email", ASCENDING)], unique=True),
+        ]
     
     class Config:
         json_schema_extra = {
@@ -60,3 +67,8 @@ class UserInDB(BaseModel):
     
     class Config:
         from_attributes = True
+    
+    @property
+    def object_id(self) -> PydanticObjectId:
+        """The user's ID as stored in task and label references."""
+        return PydanticObjectId(self.id)
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+from config import settings
+
+PROFILE_HEADER = b"x-profile"
+
+
+class _RequestTimings:
+    """Phase durations (seconds) of the request being profiled."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        # When the endpoint's serialize phase ended; FastAPI validates and
+        # encodes the response model after that
+        self.serialized_at: Optional[float] = None
+
+
+# Timings of the request being profiled, None otherwise
+_phase_timings: ContextVar[Optional[_RequestTimings]] = ContextVar("phase_timings", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the time spent in the block to a Server-Timing phase.
+    
+    Does nothing unless the current request is being profiled.
+    """
+    timings = _phase_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        timings.phases[name] = timings.phases.get(name, 0.0) + end - start
+        if name == "serialize":
+            timings.serialized_at = end
+
+
+class StackSampler:
+    """Samples the call stack of one thread into collapsed-stack counts.
+    
+    The output is the "collapsed" format understood by speedscope and
+    flamegraph.pl. Since requests share the event loop thread, samples
+    may include other requests running concurrently.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+
+
+def _write_profile(path: str, contents: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(contents)
+
+
+def _server_timing(timings: _RequestTimings, now: float, total: float) -> bytes:
+    phases = dict(timings.phases)
+    if timings.serialized_at is not None:
+        phases["response"] = now - timings.serialized_at
+    # Routing, middleware and anything outside a phase
+    phases["other"] = max(total - sum(phases.values()), 0.0)
+    entries = [f"{name};dur={duration * 1000:.2f}" for name, duration in phases.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries).encode()
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry the admin profiling header.
+    
+    Requests with `X-Profile: <PROFILING_TOKEN>` are sampled into a collapsed
+    stack file under PROFILING_OUTPUT_DIR and get a `Server-Timing` header
+    with the auth, db and serialize phases recorded through `phase()`, the
+    `response` phase from the end of `serialize` to the response headers
+    (FastAPI's response model validation and encoding), and the `other`
+    time not covered by any phase.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope) -> bool:
+        if scope["type"] != "http" or not settings.profiling_token:
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return secrets.compare_digest(value, settings.profiling_token.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+    
+        timings = _RequestTimings()
+        context_token = _phase_timings.set(timings)
+        sampler = StackSampler(threading.get_ident(), settings.profiling_interval_ms / 1000)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(timings, now, now - start)))
+                message = {**message, "headers": headers}
+            await send(message)
+    
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            sampler.stop()
+            _phase_timings.reset(context_token)
+    
+            path_part = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+            filename = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{scope['method']}-{path_part}.collapsed"
+            await asyncio.to_thread(
+                _write_profile,
+                os.path.join(settings.profiling_output_dir, filename),
+                sampler.collapsed(),
+            )
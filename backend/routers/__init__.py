@@ -2,8 +2,10 @@ from .auth import router as auth_router
 from .users import router as users_router
 from .tasks import router as tasks_router
 from .labels import router as labels_router
+from .sync import router as sync_router
+from .activity import router as activity_router
 
-__all__ = ["auth_router", "users_router", "tasks_router", "labels_router"]
+__all__ = ["auth_router", "users_router", "tasks_router", "labels_router", "sync_router", "activity_router"]
 
 
 
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional, Tuple
+from models.activity import ActivityBase, ActivityPage, ActivityResponse
+from models.user import UserInDB
+from auth import get_current_user
+from profiling import phase
+from storage import storage
+from beanie import PydanticObjectId
+from datetime import datetime, timezone
+import base64
+
+router = APIRouter(prefix="/activity", tags=["activity"])
+
+
+def _encode_cursor(entry: ActivityBase) -> str:
+    """Encode the position after an entry as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"{entry.created_at.isoformat()}|{entry.id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, PydanticObjectId]:
+    """Decode a cursor back into the (created_at, id) it points after, created_at as naive UTC."""
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        moment, entry_id = datetime.fromisoformat(created_at), PydanticObjectId(entry_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    # Stored times are naive UTC and cannot be compared with aware ones
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment, entry_id
+
+
+def activity_to_response(entry: ActivityBase) -> ActivityResponse:
+    """Convert an activity log entry to its API response."""
+    return ActivityResponse(
+        id=str(entry.id),
+        kind=entry.kind,
+        object_id=str(entry.object_id),
+        action=entry.action,
+        title=entry.title,
+        changes=entry.changes,
+        created_at=entry.created_at
+    )
+
+
+@router.get("", response_model=ActivityPage)
+async def get_activity(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Entries per page"),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get the current user's activity log, newest first.
+    
+    Entries are written in the background, so a change can take up to
+    ACTIVITY_FLUSH_INTERVAL_MS to show up.
+    """
+    before = _decode_cursor(cursor) if cursor else None
+    
+    with phase("db"):
+        # One extra entry tells whether there is another page
+        entries = await storage.activity.list(current_user.object_id, before, limit + 1)
+    
+    with phase("serialize"):
+        page = entries[:limit]
+        return ActivityPage(
+            items=[activity_to_response(entry) for entry in page],
+            next_cursor=_encode_cursor(page[-1]) if len(entries) > limit else None
+        )
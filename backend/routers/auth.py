@@ -1,16 +1,16 @@
 from datetime import timedelta, datetime
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from models.user import User, UserCreate, UserResponse
-from models.label import Label
+from models.user import UserBase, UserCreate, UserResponse
+from models.label import LabelBase
 from models.token import Token
 from auth import (
     get_password_hash,
     authenticate_user,
     create_access_token,
-    get_user_by_email,
 )
 from config import settings
+from storage import DuplicateError, storage
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -18,31 +18,27 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user: UserCreate):
     """Register a new user."""
-    # Check if user already exists
-    existing_user = await get_user_by_email(user.email)
-    if existing_user:
+    # Create new user; the unique email index rejects existing accounts
+    try:
+        new_user = await storage.users.create(UserBase(
+            email=user.email,
+            full_name=user.full_name,
+            hashed_password=get_password_hash(user.password),
+            created_at=datetime.utcnow()
+        ))
+    except DuplicateError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user using Beanie
-    new_user = User(
-        email=user.email,
-        full_name=user.full_name,
-        hashed_password=get_password_hash(user.password),
-        created_at=datetime.utcnow()
-    )
-    await new_user.insert()
-    
-    # Create default labels for new user
-    default_labels = [
-        Label(name="Work", color="#3B82F6", user_id=str(new_user.id), created_at=datetime.utcnow()),
-        Label(name="Personal", color="#10B981", user_id=str(new_user.id), created_at=datetime.utcnow()),
-        Label(name="Urgent", color="#EF4444", user_id=str(new_user.id), created_at=datetime.utcnow()),
-    ]
-    for label in default_labels:
-        await label.insert()
+    # Create default labels for new user in one write
+    now = datetime.utcnow()
+    await storage.labels.create_many([
+        LabelBase(name="Work", color="#3B82F6", user_id=new_user.id, created_at=now, updated_at=now),
+        LabelBase(name="Personal", color="#10B981", user_id=new_user.id, created_at=now, updated_at=now),
+        LabelBase(name="Urgent", color="#EF4444", user_id=new_user.id, created_at=now, updated_at=now),
+    ])
     
     return UserResponse(
         id=str(new_user.id),
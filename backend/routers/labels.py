@@ -1,63 +1,78 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
-from models.label import Label, LabelCreate, LabelUpdate, LabelResponse
+from models.label import LabelBase, LabelCreate, LabelUpdate, LabelResponse
 from models.user import UserInDB
+from models.kind import ObjectKind
+from models.activity import ActivityAction
 from auth import get_current_user
+from activity_log import record_activity
+from config import settings
+from storage import DuplicateError, storage
 from beanie import PydanticObjectId
 from datetime import datetime
 
 router = APIRouter(prefix="/labels", tags=["labels"])
 
 
+def label_to_response(label: LabelBase) -> LabelResponse:
+    """Convert a label document to its API response."""
+    return LabelResponse(
+        id=str(label.id),
+        name=label.name,
+        color=label.color,
+        user_id=str(label.user_id),
+        created_at=label.created_at
+    )
+
+
+async def check_name_available(user_id: PydanticObjectId, name: str):
+    """Reject a name the user already has on a label that references them by string.
+    
+    The unique (user_id, name) index sees a hex string user_id and an
+    ObjectId as different keys, so it only covers these labels once
+    migrate_objectid_refs.py has converted them.
+    """
+    if settings.string_ref_fallback and await storage.labels.find_by_name(user_id, name):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Label with this name already exists"
+        )
+
+
 @router.post("", response_model=LabelResponse, status_code=status.HTTP_201_CREATED)
 async def create_label(
     label: LabelCreate,
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Create a new label."""
-    # Check if label with same name already exists for this user
-    existing_label = await Label.find_one(
-        Label.name == label.name,
-        Label.user_id == current_user.id
-    )
-    if existing_label:
+    await check_name_available(current_user.object_id, label.name)
+    
+    # Names are unique per user through the (user_id, name) index
+    now = datetime.utcnow()
+    try:
+        new_label = await storage.labels.create(LabelBase(
+            name=label.name,
+            color=label.color,
+            user_id=current_user.object_id,
+            created_at=now,
+            updated_at=now
+        ))
+    except DuplicateError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Label with this name already exists"
         )
+    record_activity(new_label.user_id, ObjectKind.LABEL, new_label.id, ActivityAction.CREATED, new_label.name)
     
-    new_label = Label(
-        name=label.name,
-        color=label.color,
-        user_id=current_user.id,
-        created_at=datetime.utcnow()
-    )
-    await new_label.insert()
-    
-    return LabelResponse(
-        id=str(new_label.id),
-        name=new_label.name,
-        color=new_label.color,
-        user_id=new_label.user_id,
-        created_at=new_label.created_at
-    )
+    return label_to_response(new_label)
 
 
 @router.get("", response_model=List[LabelResponse])
 async def get_labels(current_user: UserInDB = Depends(get_current_user)):
     """Get all labels for the current user."""
-    labels = await Label.find(Label.user_id == current_user.id).sort("+created_at").to_list()
+    labels = await storage.labels.list(current_user.object_id)
     
-    return [
-        LabelResponse(
-            id=str(label.id),
-            name=label.name,
-            color=label.color,
-            user_id=label.user_id,
-            created_at=label.created_at
-        )
-        for label in labels
-    ]
+    return [label_to_response(label) for label in labels]
 
 
 @router.get("/{label_id}", response_model=LabelResponse)
@@ -67,26 +82,20 @@ async def get_label(
 ):
     """Get a specific label by ID."""
     try:
-        label = await Label.get(PydanticObjectId(label_id))
+        label = await storage.labels.get(PydanticObjectId(label_id))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid label ID"
         )
     
-    if not label or label.user_id != current_user.id:
+    if not label or label.user_id != current_user.object_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Label not found"
         )
     
-    return LabelResponse(
-        id=str(label.id),
-        name=label.name,
-        color=label.color,
-        user_id=label.user_id,
-        created_at=label.created_at
-    )
+    return label_to_response(label)
 
 
 @router.put("/{label_id}", response_model=LabelResponse)
@@ -98,45 +107,42 @@ async def update_label(
     """Update a label."""
     # Get label from database
     try:
-        label = await Label.get(PydanticObjectId(label_id))
+        label = await storage.labels.get(PydanticObjectId(label_id))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid label ID"
         )
     
-    if not label or label.user_id != current_user.id:
+    if not label or label.user_id != current_user.object_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Label not found"
         )
     
-    # Check if new name conflicts with existing label
+    # Update name if provided; conflicts are caught by the unique index
     if label_update.name is not None and label_update.name != label.name:
-        existing_label = await Label.find_one(
-            Label.name == label_update.name,
-            Label.user_id == current_user.id
-        )
-        if existing_label:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Label with this name already exists"
-            )
+        await check_name_available(current_user.object_id, label_update.name)
         label.name = label_update.name
     
     # Update color if provided
     if label_update.color is not None:
         label.color = label_update.color
     
-    await label.save()
-    
-    return LabelResponse(
-        id=str(label.id),
-        name=label.name,
-        color=label.color,
-        user_id=label.user_id,
-        created_at=label.created_at
+    label.updated_at = datetime.utcnow()
+    try:
+        await storage.labels.update(label)
+    except DuplicateError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Label with this name already exists"
+        )
+    record_activity(
+        label.user_id, ObjectKind.LABEL, label.id, ActivityAction.UPDATED, label.name,
+        changes=sorted(label_update.model_fields_set)
     )
+    
+    return label_to_response(label)
 
 
 @router.delete("/{label_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -146,18 +152,20 @@ async def delete_label(
 ):
     """Delete a label."""
     try:
-        label = await Label.get(PydanticObjectId(label_id))
+        label = await storage.labels.get(PydanticObjectId(label_id))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid label ID"
         )
     
-    if not label or label.user_id != current_user.id:
+    if not label or label.user_id != current_user.object_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Label not found"
         )
     
-    await label.delete()
+    await storage.labels.delete(label)
+    await storage.tombstones.add(label.user_id, ObjectKind.LABEL, label.id)
+    record_activity(label.user_id, ObjectKind.LABEL, label.id, ActivityAction.DELETED, label.name)
     return None
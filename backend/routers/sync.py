@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
+from models.kind import ObjectKind
+from models.sync import SyncResponse
+from models.user import UserInDB
+from auth import get_current_user
+from config import settings
+from profiling import phase
+from storage import storage
+from routers.tasks import task_to_response, parse_expand, expand_labels
+from routers.labels import label_to_response
+from datetime import datetime, timedelta, timezone
+import base64
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# Changes committed while a sync is running may carry a timestamp slightly
+# older than the token we hand out, so the next sync starts a bit earlier.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def _encode_sync_token(moment: datetime) -> str:
+    """Encode a point in time as an opaque sync token."""
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+
+def _decode_sync_token(token: str) -> datetime:
+    """Decode a sync token back into the point in time it refers to, as naive UTC."""
+    try:
+        moment = datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    # Stored times are naive UTC and cannot be compared with aware ones
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = Query(None, description="Sync token from a previous sync"),
+    expand: Optional[str] = Query(None, description="Related data to embed in tasks (supported: labels)"),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get tasks and labels changed since the given sync token, plus deletions."""
+    expand_fields = parse_expand(expand)
+    now = datetime.utcnow()
+    
+    # Without a token, or with one older than the tombstones we still keep,
+    # the client has to replace its whole dataset.
+    since_time = _decode_sync_token(since) if since else None
+    full_sync = since_time is None or since_time < now - timedelta(days=settings.tombstone_ttl_days)
+    
+    changed_since = None if full_sync else since_time
+    
+    with phase("db"):
+        tasks = await storage.tasks.changed_since(current_user.object_id, changed_since)
+        labels = await storage.labels.changed_since(current_user.object_id, changed_since)
+        tombstones = []
+        if not full_sync:
+            tombstones = await storage.tombstones.since(current_user.object_id, since_time)
+        labels_by_id = await expand_labels(tasks, current_user.object_id) if "labels" in expand_fields else None
+    
+    # A restored task is both tombstoned and changed; the change wins
+    live_ids = {task.id for task in tasks} | {label.id for label in labels}
+    deleted_tasks = []
+    deleted_labels = []
+    for tombstone in tombstones:
+        if tombstone.object_id in live_ids:
+            continue
+        if tombstone.kind == ObjectKind.TASK:
+            deleted_tasks.append(str(tombstone.object_id))
+        else:
+            deleted_labels.append(str(tombstone.object_id))
+    
+    with phase("serialize"):
+        return SyncResponse(
+            tasks=[task_to_response(task, labels_by_id) for task in tasks],
+            labels=[label_to_response(label) for label in labels],
+            deleted_tasks=deleted_tasks,
+            deleted_labels=deleted_labels,
+            sync_token=_encode_sync_token(now - SYNC_OVERLAP),
+            full_sync=full_sync
+        )
@@ -1,113 +1,413 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
-from models.task import Task, TaskCreate, TaskUpdate, TaskResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from typing import Dict, List, Optional
+from models.task import TaskBase, TaskCreate, TaskUpdate, TaskResponse
+from models.label import LabelSummary
+from models.calendar import CalendarDay, DeadlineCount
 from models.user import UserInDB
+from models.kind import ObjectKind
+from models.activity import ActivityAction
 from auth import get_current_user
+from activity_log import record_activity
+from config import settings
+from profiling import phase
+from storage import storage
 from beanie import PydanticObjectId
-from datetime import datetime
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import hashlib
+import json
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
+EXPANDABLE = {"labels"}
+
+# Longest range the calendar counts in one request
+CALENDAR_MAX_DAYS = 366
+
+
+def parse_expand(expand: Optional[str]) -> set:
+    """Parse a comma-separated expand parameter, rejecting unknown relations."""
+    if not expand:
+        return set()
+    requested = {part.strip() for part in expand.split(",") if part.strip()}
+    unknown = requested - EXPANDABLE
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported expand value: {', '.join(sorted(unknown))}"
+        )
+    return requested
+
+
+def parse_label_ids(label_ids: List[str]) -> List[PydanticObjectId]:
+    """Convert label IDs from a request into ObjectIds."""
+    try:
+        return [PydanticObjectId(label_id) for label_id in label_ids]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid label ID"
+        )
+
+
+def parse_task_ids(task_ids: List[str]) -> List[PydanticObjectId]:
+    """Convert task IDs from a request into ObjectIds."""
+    try:
+        return [PydanticObjectId(task_id) for task_id in task_ids]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid task ID"
+        )
+
+
+async def resolve_parent(
+    user_id: PydanticObjectId,
+    parent_id: Optional[str],
+    task: Optional[TaskBase] = None
+) -> Optional[PydanticObjectId]:
+    """Check a requested parent task; an existing task cannot move into its own subtree."""
+    if parent_id is None:
+        return None
+    parent_oid = parse_task_ids([parent_id])[0]
+    if task is not None and parent_oid == task.parent_id:
+        return parent_oid
+    
+    parent = await storage.tasks.get(parent_oid)
+    if not parent or parent.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parent task not found"
+        )
+    
+    if task is not None:
+        subtree_ids = {subtask.id for subtask in await storage.tasks.subtree(user_id, task.id)}
+        if parent_oid == task.id or parent_oid in subtree_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parent task would create a cycle"
+            )
+    return parent_oid
+
+
+async def resolve_blockers(
+    user_id: PydanticObjectId,
+    blocked_by: List[str],
+    task: Optional[TaskBase] = None
+) -> List[PydanticObjectId]:
+    """Check requested blocking tasks; an existing task cannot end up blocking itself.
+    
+    Only blockers the task does not already have are checked, so an
+    unchanged list stays valid after one of its tasks is deleted or archived.
+    """
+    blocker_ids = list(dict.fromkeys(parse_task_ids(blocked_by)))
+    new_ids = [
+        blocker_id for blocker_id in blocker_ids
+        if task is None or blocker_id not in task.blocked_by
+    ]
+    if not new_ids:
+        return blocker_ids
+    
+    if task is not None and task.id in new_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Dependencies would create a cycle"
+        )
+    
+    blockers = await storage.tasks.get_many(user_id, new_ids)
+    if len(blockers) != len(new_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Blocking task not found"
+        )
+    
+    # A new task has no dependents yet, so only updates can close a loop
+    if task is not None:
+        closure = await storage.tasks.dependency_closure(user_id, new_ids)
+        if any(blocker.id == task.id for blocker in closure):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Dependencies would create a cycle"
+            )
+    return blocker_ids
+
+
+async def get_owned_task(task_id: str, user_id: PydanticObjectId) -> TaskBase:
+    """Load one of the user's active tasks, or fail with 400/404."""
+    task = await storage.tasks.get(parse_task_ids([task_id])[0])
+    if not task or task.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return task
+
+
+async def expand_labels(
+    tasks: List[TaskBase],
+    user_id: PydanticObjectId
+) -> Dict[PydanticObjectId, LabelSummary]:
+    """Resolve every label referenced by the given tasks with a single query."""
+    label_ids = {label_id for task in tasks for label_id in task.labels}
+    if not label_ids:
+        return {}
+    
+    labels = await storage.labels.get_many(user_id, list(label_ids))
+    return {
+        label.id: LabelSummary(id=str(label.id), name=label.name, color=label.color)
+        for label in labels
+    }
+
+
+def task_to_response(
+    task: TaskBase,
+    labels_by_id: Optional[Dict[PydanticObjectId, LabelSummary]] = None
+) -> TaskResponse:
+    """Convert a task document to its API response, embedding labels if resolved."""
+    label_details = None
+    if labels_by_id is not None:
+        label_details = [labels_by_id[label_id] for label_id in task.labels if label_id in labels_by_id]
+    
+    return TaskResponse(
+        id=str(task.id),
+        title=task.title,
+        description=task.description,
+        priority=task.priority.value,
+        deadline=task.deadline,
+        completed=task.completed,
+        labels=[str(label_id) for label_id in task.labels],
+        label_details=label_details,
+        parent_id=str(task.parent_id) if task.parent_id else None,
+        blocked_by=[str(blocker_id) for blocker_id in task.blocked_by],
+        user_id=str(task.user_id),
+        created_at=task.created_at,
+        updated_at=task.updated_at
+    )
+
+
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: TaskCreate,
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Create a new task."""
-    new_task = Task(
+    parent_id = await resolve_parent(current_user.object_id, task.parent_id)
+    blocked_by = await resolve_blockers(current_user.object_id, task.blocked_by)
+    
+    now = datetime.utcnow()
+    new_task = await storage.tasks.create(TaskBase(
         title=task.title,
         description=task.description,
         priority=task.priority,
         deadline=task.deadline,
         completed=task.completed,
-        labels=task.labels,
-        user_id=current_user.id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-    await new_task.insert()
+        labels=parse_label_ids(task.labels),
+        parent_id=parent_id,
+        blocked_by=blocked_by,
+        user_id=current_user.object_id,
+        created_at=now,
+        updated_at=now,
+        completed_at=now if task.completed else None
+    ))
+    record_activity(new_task.user_id, ObjectKind.TASK, new_task.id, ActivityAction.CREATED, new_task.title)
     
-    return TaskResponse(
-        id=str(new_task.id),
-        title=new_task.title,
-        description=new_task.description,
-        priority=new_task.priority.value,
-        deadline=new_task.deadline,
-        completed=new_task.completed,
-        labels=new_task.labels,
-        user_id=new_task.user_id,
-        created_at=new_task.created_at,
-        updated_at=new_task.updated_at
-    )
+    return task_to_response(new_task)
 
 
 @router.get("", response_model=List[TaskResponse])
 async def get_tasks(
     label: Optional[str] = Query(None, description="Filter by label ID"),
     completed: Optional[bool] = Query(None, description="Filter by completion status"),
+    include_archived: bool = Query(False, description="Also search archived tasks"),
+    expand: Optional[str] = Query(None, description="Related data to embed (supported: labels)"),
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Get all tasks for the current user with optional filtering."""
-    # Build query
-    query = {"user_id": current_user.id}
-    if label:
-        query["labels"] = label
-    if completed is not None:
-        query["completed"] = completed
-    
-    # Use Beanie to find tasks
-    tasks = await Task.find(query).sort("-created_at").to_list()
-    
-    return [
-        TaskResponse(
-            id=str(task.id),
-            title=task.title,
-            description=task.description,
-            priority=task.priority.value,
-            deadline=task.deadline,
-            completed=task.completed,
-            labels=task.labels,
-            user_id=task.user_id,
-            created_at=task.created_at,
-            updated_at=task.updated_at
-        )
-        for task in tasks
-    ]
+    expand_fields = parse_expand(expand)
+    
+    label_id = parse_label_ids([label])[0] if label else None
+    
+    with phase("db"):
+        tasks = await storage.tasks.list(
+            current_user.object_id,
+            label_id=label_id,
+            completed=completed,
+            include_archived=include_archived
+        )
+        labels_by_id = await expand_labels(tasks, current_user.object_id) if "labels" in expand_fields else None
+    
+    with phase("serialize"):
+        return [task_to_response(task, labels_by_id) for task in tasks]
+
+
+def parse_time_zone(tz: str) -> ZoneInfo:
+    """Look up an IANA time zone name such as "Europe/Berlin"."""
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown time zone: {tz}"
+        )
+
+
+def local_midnight(day: date, zone: ZoneInfo) -> datetime:
+    """Start of a day in the given time zone, as naive UTC like stored deadlines."""
+    return datetime.combine(day, time.min, tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def calendar_days(counts: List[DeadlineCount]) -> List[CalendarDay]:
+    """Fold per status and priority counts into one entry per day."""
+    days: Dict[date, CalendarDay] = {}
+    for entry in counts:
+        day = days.setdefault(entry.day, CalendarDay(day=entry.day))
+        day.total += entry.count
+        if entry.completed:
+            day.completed += entry.count
+        else:
+            day.pending += entry.count
+        day.priority[entry.priority.value] += entry.count
+    return [days[day] for day in sorted(days)]
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match header already names this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+@router.get("/calendar", response_model=List[CalendarDay])
+async def get_calendar(
+    request: Request,
+    from_date: date = Query(..., alias="from", description="First day (YYYY-MM-DD)"),
+    to_date: date = Query(..., alias="to", description="Last day (YYYY-MM-DD), inclusive"),
+    tz: str = Query("UTC", description="IANA time zone the days are counted in"),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Count the current user's tasks per deadline day, split by status and priority.
+    
+    Only days with tasks are returned. Responses carry an ETag and can be
+    revalidated with If-None-Match.
+    """
+    zone = parse_time_zone(tz)
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'"
+        )
+    if (to_date - from_date).days >= CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Calendar range is limited to {CALENDAR_MAX_DAYS} days"
+        )
+    
+    with phase("db"):
+        counts = await storage.tasks.deadline_counts(
+            current_user.object_id,
+            local_midnight(from_date, zone),
+            local_midnight(to_date + timedelta(days=1), zone),
+            zone.key
+        )
+    
+    with phase("serialize"):
+        body = json.dumps(jsonable_encoder(calendar_days(counts)), separators=(",", ":")).encode()
+    
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.calendar_max_age_seconds}",
+        "Vary": "Authorization",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: str,
+    expand: Optional[str] = Query(None, description="Related data to embed (supported: labels)"),
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Get a specific task by ID."""
+    expand_fields = parse_expand(expand)
+    
     try:
-        task = await Task.get(PydanticObjectId(task_id))
+        with phase("db"):
+            task = await storage.tasks.get(PydanticObjectId(task_id))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid task ID"
         )
     
-    if not task or task.user_id != current_user.id:
+    if not task or task.user_id != current_user.object_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    return TaskResponse(
-        id=str(task.id),
-        title=task.title,
-        description=task.description,
-        priority=task.priority.value,
-        deadline=task.deadline,
-        completed=task.completed,
-        labels=task.labels,
-        user_id=task.user_id,
-        created_at=task.created_at,
-        updated_at=task.updated_at
-    )
+    with phase("db"):
+        labels_by_id = await expand_labels([task], current_user.object_id) if "labels" in expand_fields else None
+    
+    with phase("serialize"):
+        return task_to_response(task, labels_by_id)
+
+
+@router.get("/{task_id}/subtree", response_model=List[TaskResponse])
+async def get_subtree(
+    task_id: str,
+    depth: int = Query(
+        settings.task_graph_max_depth,
+        ge=1,
+        le=settings.task_graph_max_depth,
+        description="Number of subtask levels to include"
+    ),
+    expand: Optional[str] = Query(None, description="Related data to embed (supported: labels)"),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get a task's subtasks, level by level, with a single graph query.
+    
+    Each task carries its parent_id, so clients can rebuild the tree.
+    """
+    expand_fields = parse_expand(expand)
+    
+    with phase("db"):
+        task = await get_owned_task(task_id, current_user.object_id)
+        subtasks = await storage.tasks.subtree(current_user.object_id, task.id, depth)
+        labels_by_id = await expand_labels(subtasks, current_user.object_id) if "labels" in expand_fields else None
+    
+    with phase("serialize"):
+        return [task_to_response(subtask, labels_by_id) for subtask in subtasks]
+
+
+@router.get("/{task_id}/dependencies", response_model=List[TaskResponse])
+async def get_dependencies(
+    task_id: str,
+    depth: int = Query(
+        settings.task_graph_max_depth,
+        ge=1,
+        le=settings.task_graph_max_depth,
+        description="Number of blocked_by levels to follow"
+    ),
+    expand: Optional[str] = Query(None, description="Related data to embed (supported: labels)"),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get every task a task is blocked by, directly or transitively, nearest first."""
+    expand_fields = parse_expand(expand)
+    
+    with phase("db"):
+        task = await get_owned_task(task_id, current_user.object_id)
+        blockers = await storage.tasks.dependency_closure(current_user.object_id, [task.id], depth)
+        labels_by_id = await expand_labels(blockers, current_user.object_id) if "labels" in expand_fields else None
+    
+    with phase("serialize"):
+        return [task_to_response(blocker, labels_by_id) for blocker in blockers]
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
@@ -119,14 +419,14 @@ async def update_task(
     """Update a task."""
     # Get task from database
     try:
-        task = await Task.get(PydanticObjectId(task_id))
+        task = await storage.tasks.get(PydanticObjectId(task_id))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid task ID"
         )
     
-    if not task or task.user_id != current_user.id:
+    if not task or task.user_id != current_user.object_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
@@ -141,26 +441,61 @@ async def update_task(
         task.priority = task_update.priority
     if task_update.deadline is not None:
         task.deadline = task_update.deadline
-    if task_update.completed is not None:
+    if task_update.completed is not None and task_update.completed != task.completed:
         task.completed = task_update.completed
+        task.completed_at = datetime.utcnow() if task.completed else None
     if task_update.labels is not None:
-        task.labels = task_update.labels
+        task.labels = parse_label_ids(task_update.labels)
+    # An explicit null detaches the task from its parent
+    if "parent_id" in task_update.model_fields_set:
+        task.parent_id = await resolve_parent(current_user.object_id, task_update.parent_id, task)
+    if task_update.blocked_by is not None:
+        task.blocked_by = await resolve_blockers(current_user.object_id, task_update.blocked_by, task)
     
     task.updated_at = datetime.utcnow()
-    await task.save()
-    
-    return TaskResponse(
-        id=str(task.id),
-        title=task.title,
-        description=task.description,
-        priority=task.priority.value,
-        deadline=task.deadline,
-        completed=task.completed,
-        labels=task.labels,
-        user_id=task.user_id,
-        created_at=task.created_at,
-        updated_at=task.updated_at
+    if not await storage.tasks.update(task):
+        # Archived or deleted since it was loaded
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    record_activity(
+        task.user_id, ObjectKind.TASK, task.id, ActivityAction.UPDATED, task.title,
+        changes=sorted(task_update.model_fields_set)
     )
+    
+    return task_to_response(task)
+
+
+@router.post("/{task_id}/restore", response_model=TaskResponse)
+async def restore_task(
+    task_id: str,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Move an archived task back into the active task list."""
+    try:
+        archived = await storage.tasks.get_archived(PydanticObjectId(task_id))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid task ID"
+        )
+    
+    if not archived or archived.user_id != current_user.object_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archived task not found"
+        )
+    
+    task = await storage.tasks.restore(archived.id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archived task not found"
+        )
+    record_activity(task.user_id, ObjectKind.TASK, task.id, ActivityAction.RESTORED, task.title)
+    
+    return task_to_response(task)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -170,18 +505,20 @@ async def delete_task(
 ):
     """Delete a task."""
     try:
-        task = await Task.get(PydanticObjectId(task_id))
+        task = await storage.tasks.get(PydanticObjectId(task_id))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid task ID"
         )
     
-    if not task or task.user_id != current_user.id:
+    if not task or task.user_id != current_user.object_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    await task.delete()
+    await storage.tasks.delete(task)
+    await storage.tombstones.add(task.user_id, ObjectKind.TASK, task.id)
+    record_activity(task.user_id, ObjectKind.TASK, task.id, ActivityAction.DELETED, task.title)
     return None
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from models.user import User, UserResponse, UserInDB, UserUpdate
+from models.user import UserResponse, UserInDB, UserUpdate
 from auth import get_current_user
-from beanie import PydanticObjectId
+from storage import DuplicateError, storage
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -24,21 +24,15 @@ async def update_current_user(
 ):
     """Update current user profile."""
     # Get the user document from database
-    user = await User.get(PydanticObjectId(current_user.id))
+    user = await storage.users.get(current_user.object_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Check if email is being updated and if it's already taken
-    if user_update.email is not None and user_update.email != user.email:
-        existing_user = await User.find_one(User.email == user_update.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already taken"
-            )
+    # Update email if provided; the unique email index rejects taken ones
+    if user_update.email is not None:
         user.email = user_update.email
     
     # Update full name if provided
@@ -46,7 +40,13 @@ async def update_current_user(
         user.full_name = user_update.full_name
     
     # Save the updated user
-    await user.save()
+    try:
+        await storage.users.update(user)
+    except DuplicateError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already taken"
+        )
     
     return UserResponse(
         id=str(user.id),
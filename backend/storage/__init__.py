@@ -0,0 +1,25 @@
+from config import settings
+from .base import (
+    DuplicateError, Storage, UserRepository, TaskRepository, LabelRepository, TombstoneRepository,
+    ActivityRepository
+)
+
+
+def create_storage(engine: str) -> Storage:
+    """Create the storage engine selected by name ("mongo" or "memory")."""
+    if engine == "mongo":
+        from .mongo import MongoStorage
+        return MongoStorage()
+    if engine == "memory":
+        from .memory import MemoryStorage
+        return MemoryStorage()
+    raise ValueError(f"Unknown storage engine: {engine}")
+
+
+storage = create_storage(settings.storage_engine)
+
+__all__ = [
+    "DuplicateError", "Storage", "UserRepository", "TaskRepository", "LabelRepository", "TombstoneRepository",
+    "ActivityRepository",
+    "create_storage", "storage"
+]
@@ -0,0 +1,207 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Tuple
+from beanie import PydanticObjectId
+from models.user import UserBase
+from models.task import TaskBase
+from models.label import LabelBase
+from models.calendar import DeadlineCount
+from models.activity import ActivityBase
+from models.kind import ObjectKind
+from models.tombstone import TombstoneBase
+
+# Repositories return the models' *Base fields plus an `id`. The Mongo engine
+# hands out Beanie documents, the memory engine plain records. Callers change
+# a returned object in place and pass it to `update()` to persist it.
+
+
+class DuplicateError(Exception):
+    """A write would break a uniqueness rule (user email, label name per user)."""
+
+
+class UserRepository(ABC):
+    """Storage for user accounts."""
+
+    @abstractmethod
+    async def get(self, user_id: PydanticObjectId) -> Optional[UserBase]:
+        """Get a user by ID."""
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[UserBase]:
+        """Get a user by email."""
+
+    @abstractmethod
+    async def create(self, user: UserBase) -> UserBase:
+        """Store a new user and return it with its ID. Raises DuplicateError if the email is taken."""
+
+    @abstractmethod
+    async def update(self, user: UserBase) -> None:
+        """Persist changes to an existing user. Raises DuplicateError if the email is taken."""
+
+
+class TaskRepository(ABC):
+    """Storage for tasks, including archived ones."""
+
+    @abstractmethod
+    async def get(self, task_id: PydanticObjectId) -> Optional[TaskBase]:
+        """Get an active (not archived) task by ID."""
+
+    @abstractmethod
+    async def get_many(self, user_id: PydanticObjectId, task_ids: List[PydanticObjectId]) -> List[TaskBase]:
+        """Get the user's active tasks with the given IDs in one lookup."""
+
+    @abstractmethod
+    async def list(
+        self,
+        user_id: PydanticObjectId,
+        label_id: Optional[PydanticObjectId] = None,
+        completed: Optional[bool] = None,
+        include_archived: bool = False
+    ) -> List[TaskBase]:
+        """List a user's tasks, newest first."""
+
+    @abstractmethod
+    async def changed_since(self, user_id: PydanticObjectId, since: Optional[datetime]) -> List[TaskBase]:
+        """List a user's active tasks updated at or after `since` (all of them if None), newest first."""
+
+    @abstractmethod
+    async def subtree(
+        self,
+        user_id: PydanticObjectId,
+        task_id: PydanticObjectId,
+        max_depth: Optional[int] = None
+    ) -> List[TaskBase]:
+        """Subtasks of a task down to `max_depth` levels (all if None), level by level."""
+
+    @abstractmethod
+    async def dependency_closure(
+        self,
+        user_id: PydanticObjectId,
+        task_ids: List[PydanticObjectId],
+        max_depth: Optional[int] = None
+    ) -> List[TaskBase]:
+        """Tasks the given tasks are blocked by, directly or transitively, down to `max_depth` levels."""
+
+    @abstractmethod
+    async def deadline_counts(
+        self,
+        user_id: PydanticObjectId,
+        start: datetime,
+        end: datetime,
+        tz: str
+    ) -> List[DeadlineCount]:
+        """Count a user's tasks, archived ones included, due in [start, end) per day in time zone `tz`, status and priority."""
+
+    @abstractmethod
+    async def create(self, task: TaskBase) -> TaskBase:
+        """Store a new task and return it with its ID."""
+
+    @abstractmethod
+    async def update(self, task: TaskBase) -> bool:
+        """Persist changes to an active task; False if it was archived or deleted meanwhile."""
+
+    @abstractmethod
+    async def delete(self, task: TaskBase) -> None:
+        """Delete a task."""
+
+    @abstractmethod
+    async def get_archived(self, task_id: PydanticObjectId) -> Optional[TaskBase]:
+        """Get an archived task by ID."""
+
+    @abstractmethod
+    async def archive_batch(self, cutoff: datetime, batch_size: int) -> List[TaskBase]:
+        """Archive up to `batch_size` tasks completed before `cutoff` and return them."""
+
+    @abstractmethod
+    async def restore(self, task_id: PydanticObjectId) -> Optional[TaskBase]:
+        """Move an archived task back to the active tasks, restarting its archival clock."""
+
+
+class LabelRepository(ABC):
+    """Storage for labels."""
+
+    @abstractmethod
+    async def get(self, label_id: PydanticObjectId) -> Optional[LabelBase]:
+        """Get a label by ID."""
+
+    @abstractmethod
+    async def get_many(self, user_id: PydanticObjectId, label_ids: List[PydanticObjectId]) -> List[LabelBase]:
+        """Get the user's labels with the given IDs in one lookup."""
+
+    @abstractmethod
+    async def find_by_name(self, user_id: PydanticObjectId, name: str) -> Optional[LabelBase]:
+        """Get the user's label with the given name."""
+
+    @abstractmethod
+    async def list(self, user_id: PydanticObjectId) -> List[LabelBase]:
+        """List a user's labels, oldest first."""
+
+    @abstractmethod
+    async def changed_since(self, user_id: PydanticObjectId, since: Optional[datetime]) -> List[LabelBase]:
+        """List a user's labels updated at or after `since` (all of them if None), oldest first."""
+
+    @abstractmethod
+    async def create(self, label: LabelBase) -> LabelBase:
+        """Store a new label and return it with its ID. Raises DuplicateError if the name is taken."""
+
+    @abstractmethod
+    async def create_many(self, labels: List[LabelBase]) -> None:
+        """Store several new labels in one write. Raises DuplicateError if a name is taken."""
+
+    @abstractmethod
+    async def update(self, label: LabelBase) -> None:
+        """Persist changes to an existing label. Raises DuplicateError if the name is taken."""
+
+    @abstractmethod
+    async def delete(self, label: LabelBase) -> None:
+        """Delete a label."""
+
+
+class TombstoneRepository(ABC):
+    """Storage for deletion records used by delta sync."""
+
+    @abstractmethod
+    async def add_many(self, tombstones: List[TombstoneBase]) -> None:
+        """Record deleted tasks or labels."""
+
+    @abstractmethod
+    async def since(self, user_id: PydanticObjectId, since: datetime) -> List[TombstoneBase]:
+        """List a user's tombstones recorded at or after `since`."""
+
+    async def add(self, user_id: PydanticObjectId, kind: ObjectKind, object_id: PydanticObjectId) -> None:
+        """Record a single deleted task or label."""
+        await self.add_many([TombstoneBase(user_id=user_id, kind=kind, object_id=object_id)])
+
+
+class ActivityRepository(ABC):
+    """Storage for the activity log."""
+
+    @abstractmethod
+    async def add_many(self, entries: List[ActivityBase]) -> None:
+        """Record activity log entries."""
+
+    @abstractmethod
+    async def list(
+        self,
+        user_id: PydanticObjectId,
+        before: Optional[Tuple[datetime, PydanticObjectId]],
+        limit: int
+    ) -> List[ActivityBase]:
+        """List up to `limit` of a user's entries older than `before` (created_at, id), newest first."""
+
+
+class Storage(ABC):
+    """A storage engine: one repository per kind of data, plus its lifecycle."""
+    users: UserRepository
+    tasks: TaskRepository
+    labels: LabelRepository
+    tombstones: TombstoneRepository
+    activity: ActivityRepository
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Prepare the engine for use."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release the engine's resources."""
@@ -0,0 +1,457 @@
+import bisect
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from beanie import PydanticObjectId
+from config import settings
+from models.user import UserBase
+from models.task import TaskBase
+from models.label import LabelBase
+from models.calendar import DeadlineCount
+from models.activity import ActivityBase
+from models.tombstone import TombstoneBase
+from .base import (
+    DuplicateError, Storage, UserRepository, TaskRepository, LabelRepository, TombstoneRepository,
+    ActivityRepository
+)
+
+
+class UserRecord(UserBase):
+    """User held by the in-memory engine."""
+    id: PydanticObjectId
+
+
+class TaskRecord(TaskBase):
+    """Task held by the in-memory engine."""
+    id: PydanticObjectId
+
+
+class LabelRecord(LabelBase):
+    """Label held by the in-memory engine."""
+    id: PydanticObjectId
+
+
+class ActivityRecord(ActivityBase):
+    """Activity log entry held by the in-memory engine."""
+    id: PydanticObjectId
+
+
+def _copy(record):
+    """Hand out copies so callers' edits only land through update()."""
+    copy = record.model_copy()
+    if isinstance(copy, TaskRecord):
+        copy.labels = list(record.labels)
+        copy.blocked_by = list(record.blocked_by)
+    return copy
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Naive UTC datetime, the way MongoDB hands dates back."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class _UserTaskIndex:
+    """One user's tasks indexed by creation time, deadline, label and completion."""
+
+    def __init__(self):
+        self.by_created: List[Tuple[datetime, PydanticObjectId]] = []  # ascending
+        self.created_at: Dict[PydanticObjectId, datetime] = {}
+        self.by_deadline: List[Tuple[datetime, PydanticObjectId]] = []  # ascending
+        self.by_label: Dict[PydanticObjectId, Set[PydanticObjectId]] = defaultdict(set)
+        self.by_completed: Dict[bool, Set[PydanticObjectId]] = {True: set(), False: set()}
+
+    def add(self, task: TaskRecord):
+        bisect.insort(self.by_created, (task.created_at, task.id))
+        self.created_at[task.id] = task.created_at
+        bisect.insort(self.by_deadline, (_as_utc(task.deadline), task.id))
+        for label_id in task.labels:
+            self.by_label[label_id].add(task.id)
+        self.by_completed[task.completed].add(task.id)
+
+    def remove(self, task: TaskRecord):
+        key = (task.created_at, task.id)
+        position = bisect.bisect_left(self.by_created, key)
+        if position < len(self.by_created) and self.by_created[position] == key:
+            del self.by_created[position]
+        self.created_at.pop(task.id, None)
+        key = (_as_utc(task.deadline), task.id)
+        position = bisect.bisect_left(self.by_deadline, key)
+        if position < len(self.by_deadline) and self.by_deadline[position] == key:
+            del self.by_deadline[position]
+        for label_id in task.labels:
+            self.by_label[label_id].discard(task.id)
+            if not self.by_label[label_id]:
+                del self.by_label[label_id]
+        self.by_completed[task.completed].discard(task.id)
+
+    def due_between(self, start: datetime, end: datetime) -> Iterable[PydanticObjectId]:
+        """Tasks with a deadline in [start, end)."""
+        low = bisect.bisect_left(self.by_deadline, (start,))
+        high = bisect.bisect_left(self.by_deadline, (end,))
+        return [task_id for _, task_id in self.by_deadline[low:high]]
+
+    def newest_first(
+        self,
+        label_id: Optional[PydanticObjectId],
+        completed: Optional[bool]
+    ) -> Iterable[PydanticObjectId]:
+        candidates = None
+        if label_id is not None:
+            candidates = self.by_label.get(label_id, set())
+        if completed is not None:
+            matching = self.by_completed[completed]
+            candidates = matching if candidates is None else candidates & matching
+        if candidates is None:
+            return [task_id for _, task_id in reversed(self.by_created)]
+        # Walk the time index only when the filter keeps most tasks
+        if len(candidates) * 4 < len(self.by_created):
+            return sorted(candidates, key=lambda task_id: (self.created_at[task_id], task_id), reverse=True)
+        return [task_id for _, task_id in reversed(self.by_created) if task_id in candidates]
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self):
+        self._users: Dict[PydanticObjectId, UserRecord] = {}
+        self._by_email: Dict[str, PydanticObjectId] = {}
+
+    async def get(self, user_id: PydanticObjectId) -> Optional[UserRecord]:
+        user = self._users.get(user_id)
+        return _copy(user) if user else None
+
+    async def get_by_email(self, email: str) -> Optional[UserRecord]:
+        user_id = self._by_email.get(email)
+        return await self.get(user_id) if user_id else None
+
+    async def create(self, user: UserBase) -> UserRecord:
+        if user.email in self._by_email:
+            raise DuplicateError("Email already registered")
+        record = UserRecord(id=PydanticObjectId(), **dict(user))
+        self._users[record.id] = record
+        self._by_email[record.email] = record.id
+        return _copy(record)
+
+    async def update(self, user: UserRecord) -> None:
+        previous = self._users[user.id]
+        if previous.email != user.email:
+            if user.email in self._by_email:
+                raise DuplicateError("Email already registered")
+            del self._by_email[previous.email]
+            self._by_email[user.email] = user.id
+        self._users[user.id] = _copy(user)
+
+
+class MemoryTaskRepository(TaskRepository):
+    def __init__(self):
+        self._tasks: Dict[PydanticObjectId, TaskRecord] = {}
+        self._by_user: Dict[PydanticObjectId, _UserTaskIndex] = defaultdict(_UserTaskIndex)
+        self._archived: Dict[PydanticObjectId, TaskRecord] = {}
+        self._archived_by_user: Dict[PydanticObjectId, _UserTaskIndex] = defaultdict(_UserTaskIndex)
+        self._children: Dict[PydanticObjectId, Set[PydanticObjectId]] = defaultdict(set)
+
+    def _store(self, task: TaskRecord):
+        self._tasks[task.id] = task
+        self._by_user[task.user_id].add(task)
+        if task.parent_id is not None:
+            self._children[task.parent_id].add(task.id)
+
+    def _unstore(self, task_id: PydanticObjectId) -> TaskRecord:
+        task = self._tasks.pop(task_id)
+        self._by_user[task.user_id].remove(task)
+        if task.parent_id is not None:
+            self._children[task.parent_id].discard(task.id)
+            if not self._children[task.parent_id]:
+                del self._children[task.parent_id]
+        return task
+
+    def _walk(
+        self,
+        user_id: PydanticObjectId,
+        level: Iterable[PydanticObjectId],
+        next_ids: Callable[[TaskRecord], Iterable[PydanticObjectId]],
+        max_depth: Optional[int]
+    ) -> List[TaskRecord]:
+        """Breadth-first walk over the user's tasks, like $graphLookup, nearest first."""
+        found: List[TaskRecord] = []
+        seen: Set[PydanticObjectId] = set()
+        depth = 0
+        while level and (max_depth is None or depth < max_depth):
+            tasks = []
+            for task_id in level:
+                task = self._tasks.get(task_id)
+                if task is not None and task.user_id == user_id and task_id not in seen:
+                    seen.add(task_id)
+                    tasks.append(task)
+            tasks.sort(key=lambda t: t.created_at)
+            found.extend(tasks)
+            level = [next_id for task in tasks for next_id in next_ids(task)]
+            depth += 1
+        return [_copy(task) for task in found]
+
+    async def get(self, task_id: PydanticObjectId) -> Optional[TaskRecord]:
+        task = self._tasks.get(task_id)
+        return _copy(task) if task else None
+
+    async def get_many(self, user_id: PydanticObjectId, task_ids: List[PydanticObjectId]) -> List[TaskRecord]:
+        return [
+            _copy(self._tasks[task_id])
+            for task_id in task_ids
+            if task_id in self._tasks and self._tasks[task_id].user_id == user_id
+        ]
+
+    async def list(
+        self,
+        user_id: PydanticObjectId,
+        label_id: Optional[PydanticObjectId] = None,
+        completed: Optional[bool] = None,
+        include_archived: bool = False
+    ) -> List[TaskRecord]:
+        tasks = [
+            _copy(self._tasks[task_id])
+            for task_id in self._by_user[user_id].newest_first(label_id, completed)
+        ]
+        if include_archived or completed is True:
+            archived = [
+                _copy(self._archived[task_id])
+                for task_id in self._archived_by_user[user_id].newest_first(label_id, completed)
+            ]
+            if archived:
+                tasks = sorted(tasks + archived, key=lambda t: t.created_at, reverse=True)
+        return tasks
+
+    async def changed_since(self, user_id: PydanticObjectId, since: Optional[datetime]) -> List[TaskRecord]:
+        return [
+            _copy(task)
+            for task in (self._tasks[task_id] for task_id in self._by_user[user_id].newest_first(None, None))
+            if since is None or task.updated_at >= since
+        ]
+
+    async def subtree(
+        self,
+        user_id: PydanticObjectId,
+        task_id: PydanticObjectId,
+        max_depth: Optional[int] = None
+    ) -> List[TaskRecord]:
+        return self._walk(
+            user_id,
+            list(self._children.get(task_id, ())),
+            lambda task: self._children.get(task.id, ()),
+            max_depth
+        )
+
+    async def dependency_closure(
+        self,
+        user_id: PydanticObjectId,
+        task_ids: List[PydanticObjectId],
+        max_depth: Optional[int] = None
+    ) -> List[TaskRecord]:
+        start = [
+            blocker_id
+            for task_id in task_ids
+            if task_id in self._tasks and self._tasks[task_id].user_id == user_id
+            for blocker_id in self._tasks[task_id].blocked_by
+        ]
+        return self._walk(user_id, start, lambda task: task.blocked_by, max_depth)
+
+    async def deadline_counts(
+        self,
+        user_id: PydanticObjectId,
+        start: datetime,
+        end: datetime,
+        tz: str
+    ) -> List[DeadlineCount]:
+        zone = ZoneInfo(tz)
+        counts = Counter()
+        # Completed tasks move to the archive after a while but still count
+        # on their day
+        for tasks, index in ((self._tasks, self._by_user), (self._archived, self._archived_by_user)):
+            for task_id in index[user_id].due_between(start, end):
+                task = tasks[task_id]
+                day = _as_utc(task.deadline).replace(tzinfo=timezone.utc).astimezone(zone).date()
+                counts[(day, task.completed, task.priority)] += 1
+        return [
+            DeadlineCount(day=day, completed=completed, priority=priority, count=count)
+            for (day, completed, priority), count in counts.items()
+        ]
+
+    async def create(self, task: TaskBase) -> TaskRecord:
+        record = TaskRecord(id=PydanticObjectId(), **dict(task))
+        record.labels = list(record.labels)
+        record.blocked_by = list(record.blocked_by)
+        self._store(record)
+        return _copy(record)
+
+    async def update(self, task: TaskRecord) -> bool:
+        if task.id not in self._tasks:
+            return False
+        self._unstore(task.id)
+        self._store(_copy(task))
+        return True
+
+    async def delete(self, task: TaskRecord) -> None:
+        if task.id in self._tasks:
+            self._unstore(task.id)
+
+    async def get_archived(self, task_id: PydanticObjectId) -> Optional[TaskRecord]:
+        task = self._archived.get(task_id)
+        return _copy(task) if task else None
+
+    async def archive_batch(self, cutoff: datetime, batch_size: int) -> List[TaskRecord]:
+        batch = []
+        for task in self._tasks.values():
+            if task.completed and (task.completed_at or task.updated_at) < cutoff:
+                batch.append(task)
+                if len(batch) >= batch_size:
+                    break
+        for task in batch:
+            self._unstore(task.id)
+            self._archived[task.id] = task
+            self._archived_by_user[task.user_id].add(task)
+        return [_copy(task) for task in batch]
+
+    async def restore(self, task_id: PydanticObjectId) -> Optional[TaskRecord]:
+        task = self._archived.pop(task_id, None)
+        if task is None:
+            return None
+        self._archived_by_user[task.user_id].remove(task)
+        # Counting completion from now keeps the next archiver pass from
+        # moving the task straight back
+        task.updated_at = task.completed_at = datetime.utcnow()
+        self._store(task)
+        return _copy(task)
+
+
+class MemoryLabelRepository(LabelRepository):
+    def __init__(self):
+        self._labels: Dict[PydanticObjectId, LabelRecord] = {}
+        # Per user, in insertion (= creation) order
+        self._by_user: Dict[PydanticObjectId, Dict[PydanticObjectId, LabelRecord]] = defaultdict(dict)
+        self._by_name: Dict[Tuple[PydanticObjectId, str], PydanticObjectId] = {}
+
+    async def get(self, label_id: PydanticObjectId) -> Optional[LabelRecord]:
+        label = self._labels.get(label_id)
+        return _copy(label) if label else None
+
+    async def get_many(self, user_id: PydanticObjectId, label_ids: List[PydanticObjectId]) -> List[LabelRecord]:
+        labels = self._by_user[user_id]
+        return [_copy(labels[label_id]) for label_id in label_ids if label_id in labels]
+
+    async def find_by_name(self, user_id: PydanticObjectId, name: str) -> Optional[LabelRecord]:
+        label_id = self._by_name.get((user_id, name))
+        return await self.get(label_id) if label_id else None
+
+    async def list(self, user_id: PydanticObjectId) -> List[LabelRecord]:
+        return [_copy(label) for label in self._by_user[user_id].values()]
+
+    async def changed_since(self, user_id: PydanticObjectId, since: Optional[datetime]) -> List[LabelRecord]:
+        return [
+            _copy(label)
+            for label in self._by_user[user_id].values()
+            if since is None or label.updated_at >= since
+        ]
+
+    async def create(self, label: LabelBase) -> LabelRecord:
+        if (label.user_id, label.name) in self._by_name:
+            raise DuplicateError("Label with this name already exists")
+        record = LabelRecord(id=PydanticObjectId(), **dict(label))
+        self._labels[record.id] = record
+        self._by_user[record.user_id][record.id] = record
+        self._by_name[(record.user_id, record.name)] = record.id
+        return _copy(record)
+
+    async def create_many(self, labels: List[LabelBase]) -> None:
+        # Like an unordered insert_many: store what fits, then report conflicts
+        duplicate = False
+        for label in labels:
+            try:
+                await self.create(label)
+            except DuplicateError:
+                duplicate = True
+        if duplicate:
+            raise DuplicateError("Label with this name already exists")
+
+    async def update(self, label: LabelRecord) -> None:
+        previous = self._labels[label.id]
+        if previous.name != label.name:
+            if (label.user_id, label.name) in self._by_name:
+                raise DuplicateError("Label with this name already exists")
+            del self._by_name[(previous.user_id, previous.name)]
+            self._by_name[(label.user_id, label.name)] = label.id
+        record = _copy(label)
+        self._labels[label.id] = record
+        self._by_user[label.user_id][label.id] = record
+
+    async def delete(self, label: LabelRecord) -> None:
+        record = self._labels.pop(label.id, None)
+        if record:
+            del self._by_user[record.user_id][record.id]
+            del self._by_name[(record.user_id, record.name)]
+
+
+class MemoryTombstoneRepository(TombstoneRepository):
+    def __init__(self):
+        # Per user, in deletion order
+        self._by_user: Dict[PydanticObjectId, Deque[TombstoneBase]] = defaultdict(deque)
+
+    async def add_many(self, tombstones: List[TombstoneBase]) -> None:
+        expired_before = datetime.utcnow() - timedelta(days=settings.tombstone_ttl_days)
+        for tombstone in tombstones:
+            entries = self._by_user[tombstone.user_id]
+            entries.append(tombstone)
+            # Mirror the Mongo TTL index
+            while entries and entries[0].deleted_at < expired_before:
+                entries.popleft()
+
+    async def since(self, user_id: PydanticObjectId, since: datetime) -> List[TombstoneBase]:
+        return [tombstone for tombstone in self._by_user[user_id] if tombstone.deleted_at >= since]
+
+
+class MemoryActivityRepository(ActivityRepository):
+    def __init__(self):
+        # Per user, ascending by (created_at, id)
+        self._by_user: Dict[PydanticObjectId, List[Tuple[datetime, PydanticObjectId, ActivityRecord]]] = defaultdict(list)
+
+    async def add_many(self, entries: List[ActivityBase]) -> None:
+        expired_before = datetime.utcnow() - timedelta(days=settings.activity_ttl_days)
+        for entry in entries:
+            record = ActivityRecord(id=PydanticObjectId(), **dict(entry))
+            log = self._by_user[record.user_id]
+            bisect.insort(log, (record.created_at, record.id, record))
+            # Mirror the Mongo TTL index
+            del log[:bisect.bisect_left(log, (expired_before,))]
+
+    async def list(
+        self,
+        user_id: PydanticObjectId,
+        before: Optional[Tuple[datetime, PydanticObjectId]],
+        limit: int
+    ) -> List[ActivityRecord]:
+        log = self._by_user[user_id]
+        end = len(log) if before is None else bisect.bisect_left(log, before)
+        return [record.model_copy() for _, _, record in reversed(log[max(0, end - limit):end])]
+
+
+class MemoryStorage(Storage):
+    """Embedded in-memory storage for single-node deployments and tests.
+    
+    Data lives in process memory and is lost on restart.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all data, e.g. between tests."""
+        self.users = MemoryUserRepository()
+        self.tasks = MemoryTaskRepository()
+        self.labels = MemoryLabelRepository()
+        self.tombstones = MemoryTombstoneRepository()
+        self.activity = MemoryActivityRepository()
+
+    async def connect(self) -> None:
+        print("✓ Using in-memory storage (data is not persisted)")
+
+    async def close(self) -> None:
+        pass
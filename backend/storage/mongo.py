@@ -0,0 +1,374 @@
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+from beanie import PydanticObjectId
+from beanie.exceptions import DocumentNotFound, RevisionIdWasChanged
+from pymongo import DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from config import settings
+from database import DUPLICATE_KEY_ERROR, connect_to_mongo, close_mongo_connection
+from models.user import User, UserBase
+from models.task import Task, TaskArchive, TaskBase
+from models.label import Label, LabelBase
+from models.calendar import DeadlineCount
+from models.activity import Activity, ActivityBase
+from models.tombstone import Tombstone, TombstoneBase
+from write_coalescing import insert_task
+from .base import (
+    DuplicateError, Storage, UserRepository, TaskRepository, LabelRepository, TombstoneRepository,
+    ActivityRepository
+)
+
+
+def ref_match(object_id: PydanticObjectId):
+    """Query value matching a reference stored as an ObjectId or, before migration, a hex string."""
+    if settings.string_ref_fallback:
+        return {"$in": [object_id, str(object_id)]}
+    return object_id
+
+
+async def _insert_ignoring_duplicates(collection, documents: list) -> None:
+    """Insert documents, skipping ones already copied by an interrupted earlier run."""
+    try:
+        await collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+
+
+def _archivable_query(cutoff: datetime) -> dict:
+    """Completed tasks older than the cutoff (falls back to updated_at for legacy documents)."""
+    return {
+        "completed": True,
+        "$or": [
+            {"completed_at": {"$lt": cutoff}},
+            {"completed_at": None, "updated_at": {"$lt": cutoff}},
+        ],
+    }
+
+
+def _is_duplicate_only(error: BulkWriteError) -> bool:
+    """True if every write in a failed bulk insert hit a unique index."""
+    errors = error.details.get("writeErrors", [])
+    return bool(errors) and all(e.get("code") == DUPLICATE_KEY_ERROR for e in errors)
+
+
+def _graph_lookup(
+    user_id: PydanticObjectId,
+    start_with: str,
+    connect_from: str,
+    connect_to: str,
+    max_depth: Optional[int]
+) -> List[dict]:
+    """Pipeline stages walking the user's tasks from the matched ones, nearest first."""
+    lookup = {
+        "from": Task.get_settings().name,
+        "startWith": start_with,
+        "connectFromField": connect_from,
+        "connectToField": connect_to,
+        "as": "found",
+        "depthField": "depth",
+        "restrictSearchWithMatch": {"user_id": ref_match(user_id)},
+    }
+    if max_depth is not None:
+        lookup["maxDepth"] = max_depth - 1  # maxDepth 0 is one level
+    return [
+        {"$graphLookup": lookup},
+        {"$unwind": "$found"},
+        {"$replaceRoot": {"newRoot": "$found"}},
+        {"$sort": {"depth": 1, "created_at": 1}},
+    ]
+
+
+def _unique_tasks(documents: List[dict]) -> List[Task]:
+    """Validate traversal results, keeping the first (nearest) copy of each task."""
+    tasks = {}
+    for document in documents:
+        document.pop("depth", None)
+        if document["_id"] not in tasks:
+            tasks[document["_id"]] = Task.model_validate(document)
+    return list(tasks.values())
+
+
+class MongoUserRepository(UserRepository):
+    async def get(self, user_id: PydanticObjectId) -> Optional[User]:
+        return await User.get(user_id)
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        return await User.find_one(User.email == email)
+
+    async def create(self, user: UserBase) -> User:
+        new_user = User(**dict(user))
+        try:
+            await new_user.insert()
+        except DuplicateKeyError:
+            raise DuplicateError("Email already registered")
+        return new_user
+
+    async def update(self, user: User) -> None:
+        # save() reports a duplicate key as RevisionIdWasChanged (revisions are off)
+        try:
+            await user.save()
+        except (DuplicateKeyError, RevisionIdWasChanged):
+            raise DuplicateError("Email already registered")
+
+
+class MongoTaskRepository(TaskRepository):
+    async def get(self, task_id: PydanticObjectId) -> Optional[Task]:
+        return await Task.get(task_id)
+
+    async def get_many(self, user_id: PydanticObjectId, task_ids: List[PydanticObjectId]) -> List[Task]:
+        return await Task.find(
+            {"_id": {"$in": task_ids}, "user_id": ref_match(user_id)}
+        ).to_list()
+
+    async def list(
+        self,
+        user_id: PydanticObjectId,
+        label_id: Optional[PydanticObjectId] = None,
+        completed: Optional[bool] = None,
+        include_archived: bool = False
+    ) -> List[Task]:
+        query = {"user_id": ref_match(user_id)}
+        if label_id:
+            query["labels"] = ref_match(label_id)
+        if completed is not None:
+            query["completed"] = completed
+    
+        tasks = await Task.find(query).sort("-created_at").to_list()
+    
+        # Archived tasks are all completed, so only look there when they can match
+        if include_archived or completed is True:
+            archived = await TaskArchive.find(query).sort("-created_at").to_list()
+            if archived:
+                tasks = sorted(tasks + archived, key=lambda t: t.created_at, reverse=True)
+        return tasks
+
+    async def changed_since(self, user_id: PydanticObjectId, since: Optional[datetime]) -> List[Task]:
+        query = {"user_id": ref_match(user_id)}
+        if since is not None:
+            query["updated_at"] = {"$gte": since}
+        return await Task.find(query).sort("-created_at").to_list()
+
+    async def subtree(
+        self,
+        user_id: PydanticObjectId,
+        task_id: PydanticObjectId,
+        max_depth: Optional[int] = None
+    ) -> List[Task]:
+        pipeline = [
+            {"$match": {"_id": task_id}},
+            *_graph_lookup(user_id, "$_id", "_id", "parent_id", max_depth),
+        ]
+        documents = await Task.get_motor_collection().aggregate(pipeline).to_list(None)
+        return _unique_tasks(documents)
+
+    async def dependency_closure(
+        self,
+        user_id: PydanticObjectId,
+        task_ids: List[PydanticObjectId],
+        max_depth: Optional[int] = None
+    ) -> List[Task]:
+        pipeline = [
+            {"$match": {"_id": {"$in": task_ids}, "user_id": ref_match(user_id)}},
+            *_graph_lookup(user_id, "$blocked_by", "blocked_by", "_id", max_depth),
+        ]
+        documents = await Task.get_motor_collection().aggregate(pipeline).to_list(None)
+        return _unique_tasks(documents)
+
+    async def deadline_counts(
+        self,
+        user_id: PydanticObjectId,
+        start: datetime,
+        end: datetime,
+        tz: str
+    ) -> List[DeadlineCount]:
+        pipeline = [
+            {"$match": {"user_id": ref_match(user_id), "deadline": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"date": "$deadline", "format": "%Y-%m-%d", "timezone": tz}},
+                    "completed": "$completed",
+                    "priority": "$priority",
+                },
+                "count": {"$sum": 1},
+            }},
+        ]
+        # Completed tasks move to the archive after a while but still count
+        # on their day
+        counts = Counter()
+        for document_class in (Task, TaskArchive):
+            rows = await document_class.get_motor_collection().aggregate(pipeline).to_list(None)
+            for row in rows:
+                counts[(row["_id"]["day"], row["_id"]["completed"], row["_id"]["priority"])] += row["count"]
+        return [
+            DeadlineCount(day=day, completed=completed, priority=priority, count=count)
+            for (day, completed, priority), count in counts.items()
+        ]
+
+    async def create(self, task: TaskBase) -> Task:
+        new_task = Task(**dict(task))
+        await insert_task(new_task)
+        return new_task
+
+    async def update(self, task: Task) -> bool:
+        # Unlike save(), replace() never upserts, so a task archived or
+        # deleted since it was loaded is not written back
+        try:
+            await task.replace()
+        except DocumentNotFound:
+            return False
+        return True
+
+    async def delete(self, task: Task) -> None:
+        await task.delete()
+
+    async def get_archived(self, task_id: PydanticObjectId) -> Optional[TaskArchive]:
+        return await TaskArchive.get(task_id)
+
+    async def archive_batch(self, cutoff: datetime, batch_size: int) -> List[TaskArchive]:
+        hot = Task.get_motor_collection()
+        cold = TaskArchive.get_motor_collection()
+    
+        batch = await hot.find(_archivable_query(cutoff)).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return []
+    
+        archived_at = datetime.utcnow()
+        for document in batch:
+            document["archived_at"] = archived_at
+        await _insert_ignoring_duplicates(cold, batch)
+    
+        # Only delete tasks left exactly as copied; anything reopened or edited
+        # in the meantime stays hot and its archive copy is dropped again.
+        ids = [document["_id"] for document in batch]
+        result = await hot.bulk_write([
+            DeleteOne({"_id": document["_id"], "completed": True, "updated_at": document.get("updated_at")})
+            for document in batch
+        ], ordered=False)
+        still_hot = []
+        if result.deleted_count < len(ids):
+            still_hot = await hot.distinct("_id", {"_id": {"$in": ids}})
+            await cold.delete_many({"_id": {"$in": still_hot}})
+    
+        return [
+            TaskArchive.model_validate(document)
+            for document in batch
+            if document["_id"] not in still_hot
+        ]
+
+    async def restore(self, task_id: PydanticObjectId) -> Optional[Task]:
+        hot = Task.get_motor_collection()
+        cold = TaskArchive.get_motor_collection()
+    
+        document = await cold.find_one({"_id": task_id})
+        if document is None:
+            return None
+    
+        # Counting completion from now keeps the next archiver pass from
+        # moving the task straight back
+        now = datetime.utcnow()
+        document.pop("archived_at", None)
+        document["updated_at"] = now
+        document["completed_at"] = now
+        await _insert_ignoring_duplicates(hot, [document])
+        await cold.delete_one({"_id": task_id})
+        return await Task.get(task_id)
+
+
+class MongoLabelRepository(LabelRepository):
+    async def get(self, label_id: PydanticObjectId) -> Optional[Label]:
+        return await Label.get(label_id)
+
+    async def get_many(self, user_id: PydanticObjectId, label_ids: List[PydanticObjectId]) -> List[Label]:
+        return await Label.find(
+            {"_id": {"$in": label_ids}, "user_id": ref_match(user_id)}
+        ).to_list()
+
+    async def find_by_name(self, user_id: PydanticObjectId, name: str) -> Optional[Label]:
+        return await Label.find_one({"name": name, "user_id": ref_match(user_id)})
+
+    async def list(self, user_id: PydanticObjectId) -> List[Label]:
+        return await Label.find({"user_id": ref_match(user_id)}).sort("+created_at").to_list()
+
+    async def changed_since(self, user_id: PydanticObjectId, since: Optional[datetime]) -> List[Label]:
+        query = {"user_id": ref_match(user_id)}
+        if since is not None:
+            query["updated_at"] = {"$gte": since}
+        return await Label.find(query).sort("+created_at").to_list()
+
+    async def create(self, label: LabelBase) -> Label:
+        new_label = Label(**dict(label))
+        try:
+            await new_label.insert()
+        except DuplicateKeyError:
+            raise DuplicateError("Label with this name already exists")
+        return new_label
+
+    async def create_many(self, labels: List[LabelBase]) -> None:
+        try:
+            await Label.insert_many([Label(**dict(label)) for label in labels], ordered=False)
+        except BulkWriteError as e:
+            if _is_duplicate_only(e):
+                raise DuplicateError("Label with this name already exists")
+            raise
+
+    async def update(self, label: Label) -> None:
+        # save() reports a duplicate key as RevisionIdWasChanged (revisions are off)
+        try:
+            await label.save()
+        except (DuplicateKeyError, RevisionIdWasChanged):
+            raise DuplicateError("Label with this name already exists")
+
+    async def delete(self, label: Label) -> None:
+        await label.delete()
+
+
+class MongoTombstoneRepository(TombstoneRepository):
+    async def add_many(self, tombstones: List[TombstoneBase]) -> None:
+        if tombstones:
+            await Tombstone.insert_many([Tombstone(**dict(tombstone)) for tombstone in tombstones])
+
+    async def since(self, user_id: PydanticObjectId, since: datetime) -> List[Tombstone]:
+        return await Tombstone.find(
+            {"user_id": ref_match(user_id), "deleted_at": {"$gte": since}}
+        ).to_list()
+
+
+class MongoActivityRepository(ActivityRepository):
+    async def add_many(self, entries: List[ActivityBase]) -> None:
+        if entries:
+            await Activity.insert_many([Activity(**dict(entry)) for entry in entries])
+
+    async def list(
+        self,
+        user_id: PydanticObjectId,
+        before: Optional[Tuple[datetime, PydanticObjectId]],
+        limit: int
+    ) -> List[Activity]:
+        query = {"user_id": user_id}
+        if before is not None:
+            created_at, entry_id = before
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": entry_id}},
+            ]
+        return await Activity.find(query).sort("-created_at", "-_id").limit(limit).to_list()
+
+
+class MongoStorage(Storage):
+    """MongoDB storage through Beanie."""
+
+    def __init__(self):
+        self.users = MongoUserRepository()
+        self.tasks = MongoTaskRepository()
+        self.labels = MongoLabelRepository()
+        self.tombstones = MongoTombstoneRepository()
+        self.activity = MongoActivityRepository()
+
+    async def connect(self) -> None:
+        await connect_to_mongo()
+
+    async def close(self) -> None:
+        await close_mongo_connection()
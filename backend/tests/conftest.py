@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+# Settings are read when the app is imported, so run it on the in-memory
+# engine with background archival off, a short activity flush interval and
+# profiling available to requests sending the test token
+os.environ["STORAGE_ENGINE"] = "memory"
+os.environ["ARCHIVE_ENABLED"] = "false"
+os.environ["ACTIVITY_FLUSH_INTERVAL_MS"] = "10"
+os.environ["PROFILING_ENABLED"] = "true"
+os.environ["PROFILING_TOKEN"] = "test-profiling-token"
+_profiles_dir = tempfile.TemporaryDirectory(prefix="todo-profiles-")
+os.environ["PROFILING_OUTPUT_DIR"] = _profiles_dir.name
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from storage import storage
+
+
+@pytest.fixture
+def client():
+    """Test client for the app, starting from empty storage."""
+    storage.reset()
+    with TestClient(app) as client:
+        yield client
+
+
+def sign_up(client, email="user@example.com", password="password1"):
+    """Create an account and send its access token with every request."""
+    response = client.post("/api/auth/signup", json={"email": email, "password": password})
+    assert response.status_code == 201, response.text
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+@pytest.fixture
+def user_client(client):
+    """Test client signed in as a new user."""
+    sign_up(client)
+    return client
+
+
+def create_task(client, title="Task", **fields):
+    """Create a task and return its response body."""
+    fields.setdefault("deadline", "2030-01-01T00:00:00")
+    response = client.post("/api/tasks", json={"title": title, **fields})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def titles(response) -> list:
+    """Task titles from a task list response, in order."""
+    return [task["title"] for task in response.json()]
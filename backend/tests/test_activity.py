@@ -0,0 +1,61 @@
+import base64
+import time
+from beanie import PydanticObjectId
+from conftest import create_task
+
+
+def wait_for_activity(client, count: int) -> list:
+    """Poll until the background flusher has written `count` entries."""
+    deadline = time.monotonic() + 2
+    while True:
+        items = client.get("/api/activity?limit=200").json()["items"]
+        if len(items) >= count or time.monotonic() > deadline:
+            return items
+        time.sleep(0.01)
+
+
+def test_changes_are_logged_newest_first(user_client):
+    task = create_task(user_client, "Write report")
+    user_client.put(f"/api/tasks/{task['id']}", json={"completed": True})
+    label = user_client.post("/api/labels", json={"name": "Errands", "color": "#000000"}).json()
+    user_client.delete(f"/api/labels/{label['id']}")
+    
+    items = wait_for_activity(user_client, 4)
+    assert [(item["kind"], item["action"], item["title"]) for item in items] == [
+        ("label", "deleted", "Errands"),
+        ("label", "created", "Errands"),
+        ("task", "updated", "Write report"),
+        ("task", "created", "Write report"),
+    ]
+    assert items[2]["changes"] == ["completed"]
+
+
+def test_pages_cover_every_entry_once(user_client):
+    for i in range(12):
+        create_task(user_client, f"Task {i}")
+    wait_for_activity(user_client, 12)
+    
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        page = user_client.get("/api/activity", params=params).json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 12
+    assert len(set(seen)) == 12
+
+
+def test_invalid_cursor(user_client):
+    assert user_client.get("/api/activity?cursor=zzz").status_code == 400
+
+
+def test_cursor_with_time_zone(user_client):
+    create_task(user_client, "Task")
+    wait_for_activity(user_client, 1)
+    
+    cursor = base64.urlsafe_b64encode(f"2100-01-01T00:00:00+02:00|{PydanticObjectId()}".encode()).decode()
+    response = user_client.get("/api/activity", params={"cursor": cursor})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()["items"]] == ["Task"]
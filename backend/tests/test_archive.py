@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from beanie import PydanticObjectId
+from archiver import archive_completed_tasks
+from storage import storage
+from conftest import create_task, titles
+
+
+def archive_all(client) -> int:
+    """Archive every completed task right away."""
+    return client.portal.call(archive_completed_tasks, timedelta(days=-1), 100)
+
+
+def test_archived_task_can_be_restored(user_client):
+    task = create_task(user_client, "Done", completed=True)
+    create_task(user_client, "Open")
+    
+    assert archive_all(user_client) == 1
+    assert titles(user_client.get("/api/tasks")) == ["Open"]
+    assert sorted(titles(user_client.get("/api/tasks?include_archived=true"))) == ["Done", "Open"]
+    
+    response = user_client.post(f"/api/tasks/{task['id']}/restore")
+    assert response.status_code == 200
+    assert response.json()["completed"] is True
+    assert sorted(titles(user_client.get("/api/tasks"))) == ["Done", "Open"]
+
+
+def test_restored_task_is_not_archived_again(user_client):
+    created = create_task(user_client, "Done", completed=True)
+    task = user_client.portal.call(storage.tasks.get, PydanticObjectId(created["id"]))
+    task.completed_at = datetime.utcnow() - timedelta(days=60)
+    user_client.portal.call(storage.tasks.update, task)
+    
+    assert user_client.portal.call(archive_completed_tasks, timedelta(days=30), 100) == 1
+    user_client.post(f"/api/tasks/{created['id']}/restore")
+    
+    # Restoring restarts the archival clock
+    assert user_client.portal.call(archive_completed_tasks, timedelta(days=30), 100) == 0
+    assert titles(user_client.get("/api/tasks")) == ["Done"]
+
+
+def test_restore_unknown_task(user_client):
+    task = create_task(user_client)
+    assert user_client.post(f"/api/tasks/{task['id']}/restore").status_code == 404
+    assert user_client.post("/api/tasks/zzz/restore").status_code == 400
+
+
+def test_archived_task_cannot_be_updated(user_client):
+    task = create_task(user_client, "Done", completed=True)
+    archive_all(user_client)
+    
+    response = user_client.put(f"/api/tasks/{task['id']}", json={"title": "Renamed"})
+    assert response.status_code == 404
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from archiver import archive_completed_tasks
+from conftest import create_task
+
+
+def calendar(client, start="2030-03-01", end="2030-03-31", **params):
+    return client.get("/api/tasks/calendar", params={"from": start, "to": end, **params})
+
+
+def test_counts_per_day(user_client):
+    create_task(user_client, deadline="2030-03-01T02:00:00", priority="High")
+    create_task(user_client, deadline="2030-03-01T23:30:00", priority="Low", completed=True)
+    create_task(user_client, deadline="2030-03-02T12:00:00", priority="Medium")
+    create_task(user_client, deadline="2030-04-05T00:00:00", priority="High")
+    
+    response = calendar(user_client)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"day": "2030-03-01", "total": 2, "completed": 1, "pending": 1, "priority": {"High": 1, "Medium": 0, "Low": 1}},
+        {"day": "2030-03-02", "total": 1, "completed": 0, "pending": 1, "priority": {"High": 0, "Medium": 1, "Low": 0}},
+    ]
+
+
+def test_days_follow_time_zone(user_client):
+    create_task(user_client, deadline="2030-03-01T02:00:00")
+    
+    response = calendar(user_client, tz="America/New_York")
+    assert [day["day"] for day in response.json()] == []
+    response = calendar(user_client, start="2030-02-28", tz="America/New_York")
+    assert [day["day"] for day in response.json()] == ["2030-02-28"]
+
+
+def test_archived_tasks_are_counted(user_client):
+    create_task(user_client, deadline="2030-03-01T12:00:00", completed=True)
+    assert user_client.portal.call(archive_completed_tasks, timedelta(days=-1), 100) == 1
+    
+    assert calendar(user_client).json()[0]["completed"] == 1
+
+
+def test_unchanged_calendar_is_not_sent_again(user_client):
+    create_task(user_client, deadline="2030-03-01T12:00:00")
+    etag = calendar(user_client).headers["ETag"]
+    
+    response = user_client.get(
+        "/api/tasks/calendar",
+        params={"from": "2030-03-01", "to": "2030-03-31"},
+        headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    
+    create_task(user_client, deadline="2030-03-02T12:00:00")
+    assert calendar(user_client).headers["ETag"] != etag
+
+
+def test_invalid_ranges(user_client):
+    assert calendar(user_client, start="2030-03-31", end="2030-03-01").status_code == 400
+    assert calendar(user_client, start="2030-01-01", end="2031-12-31").status_code == 400
+    assert calendar(user_client, tz="Mars/Olympus_Mons").status_code == 400
@@ -0,0 +1,64 @@
+import pytest
+from storage import storage
+from conftest import create_task
+
+
+@pytest.fixture
+def label_lookups(monkeypatch):
+    """Record the label IDs of every storage.labels.get_many call."""
+    calls = []
+    get_many = storage.labels.get_many
+    
+    async def counting_get_many(user_id, label_ids):
+        calls.append(sorted(label_ids))
+        return await get_many(user_id, label_ids)
+    
+    monkeypatch.setattr(storage.labels, "get_many", counting_get_many)
+    return calls
+
+
+def test_task_list_embeds_labels_with_one_lookup(user_client, label_lookups):
+    labels = {label["name"]: label for label in user_client.get("/api/labels").json()}
+    work, urgent = labels["Work"]["id"], labels["Urgent"]["id"]
+    for i in range(5):
+        create_task(user_client, f"Task {i}", labels=[work, urgent] if i % 2 else [work])
+    label_lookups.clear()
+    
+    tasks = user_client.get("/api/tasks?expand=labels").json()
+    assert len(label_lookups) == 1
+    assert len(label_lookups[0]) == 2
+    for task in tasks:
+        assert [label["id"] for label in task["label_details"]] == task["labels"]
+    task = next(task for task in tasks if task["title"] == "Task 3")
+    assert task["label_details"][1] == {"id": urgent, "name": "Urgent", "color": labels["Urgent"]["color"]}
+
+
+def test_labels_are_not_embedded_by_default(user_client, label_lookups):
+    work = user_client.get("/api/labels").json()[0]["id"]
+    create_task(user_client, labels=[work])
+    label_lookups.clear()
+    
+    assert user_client.get("/api/tasks").json()[0]["label_details"] is None
+    assert label_lookups == []
+
+
+def test_tasks_without_labels_need_no_lookup(user_client, label_lookups):
+    create_task(user_client)
+    label_lookups.clear()
+    
+    assert user_client.get("/api/tasks?expand=labels").json()[0]["label_details"] == []
+    assert label_lookups == []
+
+
+def test_sync_and_single_task_embed_labels(user_client, label_lookups):
+    work = user_client.get("/api/labels").json()[0]
+    task = create_task(user_client, labels=[work["id"]])
+    label_lookups.clear()
+    
+    assert user_client.get(f"/api/tasks/{task['id']}?expand=labels").json()["label_details"][0]["name"] == work["name"]
+    assert user_client.get("/api/sync?expand=labels").json()["tasks"][0]["label_details"][0]["name"] == work["name"]
+    assert len(label_lookups) == 2
+
+
+def test_unknown_expand_field(user_client):
+    assert user_client.get("/api/tasks?expand=owner").status_code == 400
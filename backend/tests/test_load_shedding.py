@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from load_shedding import RouteLimiter, route_group, route_limiters
+
+
+def test_route_groups():
+    assert route_group("POST", "/api/auth/login") == "auth"
+    assert route_group("GET", "/api/tasks") == "task_reads"
+    assert route_group("GET", "/api/sync") == "task_reads"
+    assert route_group("PUT", "/api/tasks/1") == "task_writes"
+    assert route_group("DELETE", "/api/labels/1") == "labels"
+    assert route_group("GET", "/health") is None
+
+
+def test_full_queue_sheds_immediately():
+    async def run():
+        limiter = RouteLimiter(1, max_queue=1, queue_timeout=1)
+        assert await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 1
+    
+        assert await limiter.acquire() is False
+        limiter.release()
+        assert await waiting
+        return limiter.stats()
+    
+    assert asyncio.run(run()) == {"in_flight": 1, "queued": 0, "shed": 1, "max_concurrency": 1, "max_queue": 1}
+
+
+def test_queue_timeout_sheds():
+    async def run():
+        limiter = RouteLimiter(1, max_queue=5, queue_timeout=0.01)
+        await limiter.acquire()
+        assert await limiter.acquire() is False
+        return limiter.stats()
+    
+    stats = asyncio.run(run())
+    assert stats["shed"] == 1
+    assert stats["queued"] == 0
+
+
+@pytest.fixture
+def busy_labels(client, monkeypatch):
+    """Labels limiter with no queue whose only slot is taken."""
+    limiter = client.portal.call(lambda: RouteLimiter(1, max_queue=0, queue_timeout=0.01))
+    monkeypatch.setitem(route_limiters, "labels", limiter)
+    client.portal.call(limiter.acquire)
+    yield limiter
+    client.portal.call(limiter.release)
+
+
+def test_shed_request_gets_503_with_retry_after(user_client, busy_labels):
+    response = user_client.get("/api/labels")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    
+    # Other groups keep their own budget
+    assert user_client.get("/api/tasks").status_code == 200
+
+
+def test_load_stats(user_client, busy_labels):
+    user_client.get("/api/labels")
+    user_client.get("/api/labels")
+    
+    stats = user_client.get("/health/load").json()
+    assert set(stats) == {"auth", "task_reads", "task_writes", "labels"}
+    assert stats["labels"]["in_flight"] == 1
+    assert stats["labels"]["shed"] == 2
+    assert stats["task_reads"]["in_flight"] == 0
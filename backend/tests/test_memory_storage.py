@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta
+from beanie import PydanticObjectId
+from models.task import TaskBase
+from storage.memory import MemoryStorage
+
+USER_ID = PydanticObjectId()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def new_task(title: str, **fields) -> TaskBase:
+    return TaskBase(title=title, deadline=datetime(2030, 1, 1), user_id=USER_ID, **fields)
+
+
+def test_records_are_copies():
+    storage = MemoryStorage()
+    task = run(storage.tasks.create(new_task("Original")))
+    
+    task.title = "Changed"
+    assert run(storage.tasks.get(task.id)).title == "Original"
+    assert run(storage.tasks.update(task)) is True
+    assert run(storage.tasks.get(task.id)).title == "Changed"
+
+
+def test_list_filters_newest_first():
+    storage = MemoryStorage()
+    label_id = PydanticObjectId()
+    now = datetime.utcnow()
+    run(storage.tasks.create(new_task("old", labels=[label_id], created_at=now - timedelta(hours=1))))
+    run(storage.tasks.create(new_task("new", labels=[label_id], created_at=now)))
+    run(storage.tasks.create(new_task("done", completed=True, created_at=now)))
+    
+    assert [task.title for task in run(storage.tasks.list(USER_ID, label_id=label_id))] == ["new", "old"]
+    assert [task.title for task in run(storage.tasks.list(USER_ID, completed=True))] == ["done"]
+    assert run(storage.tasks.list(PydanticObjectId())) == []
+
+
+def test_archive_batch_respects_cutoff_and_size():
+    storage = MemoryStorage()
+    now = datetime.utcnow()
+    for title in ["a", "b", "c"]:
+        run(storage.tasks.create(new_task(title, completed=True, completed_at=now - timedelta(days=40))))
+    run(storage.tasks.create(new_task("recent", completed=True, completed_at=now)))
+    
+    assert len(run(storage.tasks.archive_batch(now - timedelta(days=30), 2))) == 2
+    assert len(run(storage.tasks.archive_batch(now - timedelta(days=30), 2))) == 1
+    assert run(storage.tasks.archive_batch(now - timedelta(days=30), 2)) == []
+    assert [task.title for task in run(storage.tasks.list(USER_ID))] == ["recent"]
+
+
+def test_update_of_archived_task_reports_missing():
+    storage = MemoryStorage()
+    task = run(storage.tasks.create(new_task("Done", completed=True, completed_at=datetime.utcnow())))
+    run(storage.tasks.archive_batch(datetime.utcnow() + timedelta(days=1), 10))
+    
+    task.title = "Renamed"
+    assert run(storage.tasks.update(task)) is False
+    assert run(storage.tasks.get(task.id)) is None
+    assert run(storage.tasks.get_archived(task.id)).title == "Done"
+
+
+def test_reset_drops_all_data():
+    storage = MemoryStorage()
+    run(storage.tasks.create(new_task("Task")))
+    storage.reset()
+    assert run(storage.tasks.list(USER_ID)) == []
@@ -0,0 +1,24 @@
+from conftest import create_task
+
+PROFILE_HEADERS = {"X-Profile": "test-profiling-token"}
+
+
+def server_timing(response) -> dict:
+    """Phase durations in milliseconds from a Server-Timing header."""
+    entries = (entry.split(";dur=") for entry in response.headers["server-timing"].split(", "))
+    return {name: float(duration) for name, duration in entries}
+
+
+def test_phases_cover_the_request(user_client):
+    create_task(user_client)
+    
+    timings = server_timing(user_client.get("/api/tasks", headers=PROFILE_HEADERS))
+    assert {"auth", "db", "serialize", "response", "other", "total"} <= set(timings)
+    phases = sum(duration for name, duration in timings.items() if name != "total")
+    assert abs(phases - timings["total"]) < 0.1
+
+
+def test_requests_without_token_are_not_profiled(user_client):
+    assert "server-timing" not in user_client.get("/api/tasks").headers
+    response = user_client.get("/api/tasks", headers={"X-Profile": "wrong"})
+    assert "server-timing" not in response.headers
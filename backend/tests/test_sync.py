@@ -0,0 +1,47 @@
+import base64
+from datetime import datetime, timedelta, timezone
+from archiver import archive_completed_tasks
+from conftest import create_task
+
+
+def test_deletions_since_token(user_client):
+    token = user_client.get("/api/sync").json()["sync_token"]
+    kept = create_task(user_client, "kept")
+    deleted = create_task(user_client, "deleted")
+    user_client.delete(f"/api/tasks/{deleted['id']}")
+    
+    response = user_client.get("/api/sync", params={"since": token}).json()
+    assert response["full_sync"] is False
+    assert [task["id"] for task in response["tasks"]] == [kept["id"]]
+    assert response["deleted_tasks"] == [deleted["id"]]
+
+
+def test_archived_tasks_sync_as_deletions_until_restored(user_client):
+    task = create_task(user_client, completed=True)
+    token = user_client.get("/api/sync").json()["sync_token"]
+    user_client.portal.call(archive_completed_tasks, timedelta(days=-1), 100)
+    
+    response = user_client.get("/api/sync", params={"since": token}).json()
+    assert response["deleted_tasks"] == [task["id"]]
+    
+    token = response["sync_token"]
+    user_client.post(f"/api/tasks/{task['id']}/restore")
+    response = user_client.get("/api/sync", params={"since": token}).json()
+    assert [synced["id"] for synced in response["tasks"]] == [task["id"]]
+
+
+def test_invalid_token(user_client):
+    assert user_client.get("/api/sync", params={"since": "zz"}).status_code == 400
+
+
+def test_token_with_time_zone(user_client):
+    create_task(user_client, "task")
+    token = base64.urlsafe_b64encode(b"2000-01-01T00:00:00+00:00").decode()
+    response = user_client.get("/api/sync", params={"since": token})
+    assert response.status_code == 200
+    assert response.json()["full_sync"] is True
+    
+    token = base64.urlsafe_b64encode(datetime.now(timezone.utc).isoformat().encode()).decode()
+    response = user_client.get("/api/sync", params={"since": token})
+    assert response.status_code == 200
+    assert response.json()["full_sync"] is False
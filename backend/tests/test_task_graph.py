@@ -0,0 +1,53 @@
+from beanie import PydanticObjectId
+from conftest import create_task, titles
+
+
+def test_subtree_and_cycles(user_client):
+    root = create_task(user_client, "root")
+    child = create_task(user_client, "child", parent_id=root["id"])
+    grandchild = create_task(user_client, "grandchild", parent_id=child["id"])
+    
+    assert titles(user_client.get(f"/api/tasks/{root['id']}/subtree")) == ["child", "grandchild"]
+    assert titles(user_client.get(f"/api/tasks/{root['id']}/subtree?depth=1")) == ["child"]
+    
+    response = user_client.put(f"/api/tasks/{root['id']}", json={"parent_id": grandchild["id"]})
+    assert response.status_code == 400
+    response = user_client.put(f"/api/tasks/{root['id']}", json={"parent_id": root["id"]})
+    assert response.status_code == 400
+
+
+def test_dependencies_and_cycles(user_client):
+    first = create_task(user_client, "first")
+    second = create_task(user_client, "second", blocked_by=[first["id"]])
+    third = create_task(user_client, "third", blocked_by=[second["id"]])
+    
+    assert titles(user_client.get(f"/api/tasks/{third['id']}/dependencies")) == ["second", "first"]
+    
+    response = user_client.put(f"/api/tasks/{first['id']}", json={"blocked_by": [third["id"]]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Dependencies would create a cycle"
+
+
+def test_unknown_blocking_task(user_client):
+    response = user_client.post(
+        "/api/tasks",
+        json={"title": "Task", "deadline": "2030-01-01T00:00:00", "blocked_by": [str(PydanticObjectId())]}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Blocking task not found"
+
+
+def test_unchanged_blockers_survive_deleted_blocker(user_client):
+    blocker = create_task(user_client, "blocker")
+    task = create_task(user_client, "task", blocked_by=[blocker["id"]])
+    assert user_client.delete(f"/api/tasks/{blocker['id']}").status_code == 204
+    
+    response = user_client.put(f"/api/tasks/{task['id']}", json={"title": "renamed", "blocked_by": [blocker["id"]]})
+    assert response.status_code == 200
+    assert response.json()["blocked_by"] == [blocker["id"]]
+    
+    response = user_client.put(
+        f"/api/tasks/{task['id']}",
+        json={"blocked_by": [blocker["id"], str(PydanticObjectId())]}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,81 @@
+import pytest
+from config import settings
+from storage import storage
+from conftest import sign_up
+
+
+@pytest.fixture
+def storage_calls(monkeypatch):
+    """Record the user and label repository calls made by the routers."""
+    calls = []
+    # Engines may implement one method with another, e.g. create_many with create
+    nested = []
+    for repository_name in ("users", "labels"):
+        repository = getattr(storage, repository_name)
+        for name in ("get", "get_by_email", "create", "update", "get_many", "find_by_name", "list", "create_many"):
+            method = getattr(repository, name, None)
+            if method is None:
+                continue
+            
+            async def recorded(*args, _method=method, _name=f"{repository_name}.{name}", **kwargs):
+                if not nested:
+                    calls.append(_name)
+                nested.append(_name)
+                try:
+                    return await _method(*args, **kwargs)
+                finally:
+                    nested.pop()
+    
+            monkeypatch.setattr(repository, name, recorded)
+    return calls
+
+
+def test_signup_makes_two_writes(client, storage_calls):
+    response = client.post("/api/auth/signup", json={"email": "new@example.com", "password": "password1"})
+    assert response.status_code == 201
+    assert storage_calls == ["users.create", "labels.create_many"]
+
+
+def test_duplicate_email_is_rejected(client):
+    sign_up(client, "taken@example.com")
+    
+    response = client.post("/api/auth/signup", json={"email": "taken@example.com", "password": "password1"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+
+def test_email_change_to_taken_address(client):
+    sign_up(client, "first@example.com")
+    sign_up(client, "second@example.com")
+    
+    response = client.put("/api/users/me", json={"email": "first@example.com"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already taken"
+    assert client.put("/api/users/me", json={"email": "third@example.com"}).status_code == 200
+
+
+def test_duplicate_label_name(user_client):
+    response = user_client.post("/api/labels", json={"name": "Work", "color": "#000000"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Label with this name already exists"
+    
+    label = user_client.post("/api/labels", json={"name": "Home", "color": "#000000"}).json()
+    response = user_client.put(f"/api/labels/{label['id']}", json={"name": "Personal"})
+    assert response.status_code == 400
+    assert user_client.put(f"/api/labels/{label['id']}", json={"name": "Home", "color": "#111111"}).status_code == 200
+
+
+def test_label_names_are_unique_per_user(client):
+    sign_up(client, "first@example.com")
+    sign_up(client, "second@example.com")
+    
+    assert client.post("/api/labels", json={"name": "Home", "color": "#000000"}).status_code == 201
+    assert [label["name"] for label in client.get("/api/labels").json()] == ["Work", "Personal", "Urgent", "Home"]
+
+
+@pytest.mark.parametrize("fallback, lookups", [(True, ["labels.find_by_name"]), (False, [])])
+def test_name_lookup_only_while_string_refs_remain(user_client, storage_calls, monkeypatch, fallback, lookups):
+    monkeypatch.setattr(settings, "string_ref_fallback", fallback)
+    user_client.post("/api/labels", json={"name": "Home", "color": "#000000"})
+    
+    assert [call for call in storage_calls if call == "labels.find_by_name"] == lookups
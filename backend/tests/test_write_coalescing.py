@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from database import DUPLICATE_KEY_ERROR
+from write_coalescing import InsertBatcher
+
+
+class FakeDocument:
+    """Stands in for a Beanie document class, recording each insert_many."""
+    batches = []
+    fail_with = None
+
+    def __init__(self, name: str):
+        self.id = None
+        self.name = name
+
+    @classmethod
+    async def insert_many(cls, documents, ordered=True):
+        cls.batches.append([document.name for document in documents])
+        if cls.fail_with:
+            raise cls.fail_with(documents)
+
+
+@pytest.fixture(autouse=True)
+def fake_document():
+    FakeDocument.batches = []
+    FakeDocument.fail_with = None
+    return FakeDocument
+
+
+def insert_all(batcher: InsertBatcher, names) -> list:
+    async def run():
+        return await asyncio.gather(
+            *(batcher.insert(FakeDocument(name)) for name in names),
+            return_exceptions=True
+        )
+    return asyncio.run(run())
+
+
+def test_inserts_within_window_share_one_write():
+    ids = insert_all(InsertBatcher(FakeDocument, window=0.01, max_batch=100), ["a", "b", "c"])
+    
+    assert FakeDocument.batches == [["a", "b", "c"]]
+    assert len(set(ids)) == 3
+
+
+def test_batch_cap_starts_a_new_write():
+    insert_all(InsertBatcher(FakeDocument, window=0.01, max_batch=2), ["a", "b", "c", "d", "e"])
+    
+    assert FakeDocument.batches == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_inserts_after_window_are_written_separately():
+    batcher = InsertBatcher(FakeDocument, window=0.001, max_batch=100)
+    
+    async def run():
+        await batcher.insert(FakeDocument("a"))
+        await batcher.insert(FakeDocument("b"))
+    asyncio.run(run())
+    
+    assert FakeDocument.batches == [["a"], ["b"]]
+
+
+def test_each_caller_gets_its_own_error():
+    def bulk_error(documents):
+        return BulkWriteError({"writeErrors": [
+            {"index": 1, "code": DUPLICATE_KEY_ERROR, "errmsg": "duplicate"},
+            {"index": 2, "code": 121, "errmsg": "validation failed"},
+        ]})
+    FakeDocument.fail_with = bulk_error
+    
+    results = insert_all(InsertBatcher(FakeDocument, window=0.01, max_batch=100), ["ok", "dup", "invalid"])
+    
+    assert not isinstance(results[0], Exception)
+    assert isinstance(results[1], DuplicateKeyError)
+    assert isinstance(results[2], WriteError) and not isinstance(results[2], DuplicateKeyError)
+
+
+def test_failed_write_fails_every_caller():
+    FakeDocument.fail_with = lambda documents: ConnectionError("connection lost")
+    
+    results = insert_all(InsertBatcher(FakeDocument, window=0.01, max_batch=100), ["a", "b"])
+    
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_close_writes_pending_inserts():
+    batcher = InsertBatcher(FakeDocument, window=60, max_batch=100)
+    
+    async def run():
+        pending = asyncio.create_task(batcher.insert(FakeDocument("a")))
+        await asyncio.sleep(0)
+        await batcher.close()
+        return await pending
+    assert asyncio.run(run()) is not None
+    
+    assert FakeDocument.batches == [["a"]]
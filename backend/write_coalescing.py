@@ -0,0 +1,111 @@
+import asyncio
+from typing import List, Optional, Set, Tuple, Type
+from beanie import Document, PydanticObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from config import settings
+from database import DUPLICATE_KEY_ERROR
+from models.task import Task
+
+
+class InsertBatcher:
+    """Coalesces concurrent inserts of one document class into `insert_many` calls.
+    
+    Inserts arriving within `window` seconds of the first pending one, or
+    until `max_batch` are pending, are written together. IDs are assigned
+    up front so every caller gets its own ID, or its own error, back.
+    """
+
+    def __init__(self, document_class: Type[Document], window: float, max_batch: int):
+        self.document_class = document_class
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Document, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    async def insert(self, document: Document) -> PydanticObjectId:
+        """Queue a document for the next batch and wait until it is written."""
+        loop = asyncio.get_running_loop()
+        if document.id is None:
+            document.id = PydanticObjectId()
+        future = loop.create_future()
+        self._pending.append((document, future))
+    
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+    
+        # The write goes ahead even if the caller goes away
+        await asyncio.shield(future)
+        return document.id
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        write = asyncio.create_task(self._write(batch))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[Tuple[Document, asyncio.Future]]):
+        errors = {}
+        try:
+            await self.document_class.insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+    
+        for index, (document, future) in enumerate(batch):
+            if future.done():
+                continue
+            error = errors.get(index)
+            if error is None:
+                future.set_result(document.id)
+            elif error.get("code") == DUPLICATE_KEY_ERROR:
+                future.set_exception(DuplicateKeyError(error.get("errmsg"), error.get("code"), error))
+            else:
+                future.set_exception(WriteError(error.get("errmsg"), error.get("code"), error))
+
+    async def close(self):
+        """Write anything still pending and wait for in-flight batches."""
+        self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+
+_task_batcher: Optional[InsertBatcher] = None
+
+
+async def insert_task(task: Task):
+    """Insert a task, coalescing with concurrent inserts when enabled."""
+    if _task_batcher is None:
+        await task.insert()
+    else:
+        await _task_batcher.insert(task)
+
+
+def start_task_batcher():
+    """Enable write coalescing for task inserts if configured."""
+    global _task_batcher
+    if settings.task_insert_coalescing and _task_batcher is None:
+        _task_batcher = InsertBatcher(
+            Task,
+            window=settings.task_insert_window_ms / 1000,
+            max_batch=settings.task_insert_max_batch,
+        )
+
+
+async def stop_task_batcher():
+    """Flush pending task inserts and disable write coalescing."""
+    global _task_batcher
+    if _task_batcher:
+        batcher, _task_batcher = _task_batcher, None
+        await batcher.close()